@@ -0,0 +1,213 @@
+# src/analysis/crime_cube.py
+"""
+crime_cube.py
+------------------------------------
+Dense pre-aggregated count cube behind the dashboard's temporal charts.
+
+Main cube:  Year x Month x Weekday x Hour x Primary Type
+            measures: count, arrests, domestic
+Area cube:  Year x Month x Primary Type x Community Area (count)
+
+Community Area lives in its own cube because the full 6-D product would be
+~80M cells, and no chart needs area broken down by weekday/hour. Any chart
+that slices these dimensions is answered by summing over a few thousand
+cells instead of scanning rows.
+"""
+
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_PATH = BASE_DIR / "data" / "processed" / "sample_500000_rows.parquet"
+CUBE_PATH = BASE_DIR / "data" / "processed" / "crime_cube.npz"
+
+DIMENSIONS = ["Year", "Month", "Weekday", "Hour", "Primary Type"]
+AREA_DIMENSIONS = ["Year", "Month", "Primary Type", "Community Area"]
+MEASURES = ["count", "arrests", "domestic"]
+INPUT_COLUMNS = ["Date", "Primary Type", "Community Area", "Arrest", "Domestic"]
+
+
+def _codes(values, axis):
+    """Position of every value on a sorted axis."""
+    return np.searchsorted(axis, values)
+
+
+def _checked_codes(values, axis):
+    """Like ``_codes`` but raises KeyError for values missing from the axis."""
+    codes = np.minimum(_codes(values, axis), len(axis) - 1)
+    missing = axis[codes] != values
+    if missing.any():
+        raise KeyError(f"not on cube axis: {np.unique(values[missing])[:5]}")
+    return codes
+
+
+def _columns(df):
+    """Dimension values of every row."""
+    date = pd.to_datetime(df["Date"])
+    return {
+        "Year": date.dt.year.to_numpy(),
+        "Month": date.dt.month.to_numpy(),
+        "Weekday": date.dt.weekday.to_numpy(),
+        "Hour": date.dt.hour.to_numpy(),
+        "Primary Type": df["Primary Type"].astype(str).to_numpy(dtype=str),
+        "Community Area": df["Community Area"].to_numpy(dtype=np.float64),
+    }
+
+
+def _add_cells(arr, flat, weights):
+    """Add ``weights`` to the cells ``flat`` of the unsigned array ``arr``, in place.
+
+    Only the touched cells are read and written (widened to int64 for the sum).
+    """
+    cells, inverse = np.unique(flat, return_inverse=True)
+    delta = np.bincount(inverse, weights=weights, minlength=len(cells)).astype(np.int64)
+    values = arr.reshape(-1)  # a view: arr is contiguous
+    values[cells] = values[cells].astype(np.int64) + delta
+
+
+class CrimeCube:
+    def __init__(self, axes, measures, area_counts):
+        self.axes = axes                # dimension -> sorted label array
+        self.measures = measures        # measure -> array shaped like DIMENSIONS
+        self.area_counts = area_counts  # array shaped like AREA_DIMENSIONS
+
+    # ---------------- build / persist ----------------
+    @classmethod
+    def build(cls, df):
+        cols = _columns(df)
+        years = np.arange(cols["Year"].min(), cols["Year"].max() + 1)
+        axes = {
+            "Year": years,
+            "Month": np.arange(1, 13),
+            "Weekday": np.arange(7),
+            "Hour": np.arange(24),
+            "Primary Type": np.unique(cols["Primary Type"]),
+        }
+
+        shape = tuple(len(axes[d]) for d in DIMENSIONS)
+        flat = np.ravel_multi_index([_codes(cols[d], axes[d]) for d in DIMENSIONS], shape)
+        size = int(np.prod(shape))
+        measures = {
+            "count": np.bincount(flat, minlength=size),
+            "arrests": np.bincount(flat, weights=df["Arrest"].to_numpy(dtype=np.float64), minlength=size),
+            "domestic": np.bincount(flat, weights=df["Domestic"].to_numpy(dtype=np.float64), minlength=size),
+        }
+        measures = {k: v.astype(np.uint32).reshape(shape) for k, v in measures.items()}
+
+        area = cols["Community Area"]
+        has_area = ~np.isnan(area)
+        axes["Community Area"] = np.unique(area[has_area])
+        area_shape = tuple(len(axes[d]) for d in AREA_DIMENSIONS)
+        area_flat = np.ravel_multi_index(
+            [_codes(cols[d][has_area], axes[d]) for d in AREA_DIMENSIONS], area_shape)
+        area_counts = (np.bincount(area_flat, minlength=int(np.prod(area_shape)))
+                       .astype(np.uint32).reshape(area_shape))
+        return cls(axes, measures, area_counts)
+
+    def update(self, added, removed=None):
+        """Add the rows of ``added`` and subtract those of ``removed``, in place.
+
+        Raises KeyError if a row falls outside the axes (a new year, crime
+        type or community area); the cube must then be rebuilt.
+        """
+        # resolve (and validate) every row before touching the cube
+        changes = []
+        for sign, df in [(1, added), (-1, removed)]:
+            if df is None or not len(df):
+                continue
+            cols = _columns(df)
+            flat = np.ravel_multi_index([_checked_codes(cols[d], self.axes[d]) for d in DIMENSIONS],
+                                        self.measures["count"].shape)
+            has_area = ~np.isnan(cols["Community Area"])
+            area_flat = np.ravel_multi_index(
+                [_checked_codes(cols[d][has_area], self.axes[d]) for d in AREA_DIMENSIONS],
+                self.area_counts.shape)
+            changes.append((sign, df, flat, area_flat))
+
+        for sign, df, flat, area_flat in changes:
+            weights = {"count": np.full(len(df), sign),
+                       "arrests": sign * df["Arrest"].to_numpy(dtype=np.int64),
+                       "domestic": sign * df["Domestic"].to_numpy(dtype=np.int64)}
+            for m, w in weights.items():
+                _add_cells(self.measures[m], flat, w)
+            _add_cells(self.area_counts, area_flat, np.full(len(area_flat), sign))
+        return self
+
+    def save(self, path=CUBE_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {f"axis/{d}": a for d, a in self.axes.items()}
+        arrays.update({f"measure/{m}": a for m, a in self.measures.items()})
+        arrays["area_counts"] = self.area_counts
+        np.savez_compressed(path, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        with np.load(path, allow_pickle=False) as z:
+            axes = {k.split("/", 1)[1]: z[k] for k in z.files if k.startswith("axis/")}
+            measures = {k.split("/", 1)[1]: z[k] for k in z.files if k.startswith("measure/")}
+            area_counts = z["area_counts"]
+        return cls(axes, measures, area_counts)
+
+    # ---------------- queries ----------------
+    def _selection(self, dims, where, months):
+        """Index arrays per dimension plus an optional Year x Month cell mask."""
+        where = where or {}
+        index = []
+        for d in dims:
+            if d in where:
+                index.append(np.flatnonzero(np.isin(self.axes[d], np.atleast_1d(where[d]))))
+            else:
+                index.append(np.arange(len(self.axes[d])))
+        mask = None
+        if months is not None:
+            start, end = (pd.Timestamp(m).to_period("M") for m in months)
+            years = self.axes["Year"][index[dims.index("Year")]]
+            mons = self.axes["Month"][index[dims.index("Month")]]
+            period = years[:, None] * 12 + (mons[None, :] - 1)
+            mask = (period >= start.year * 12 + start.month - 1) & (period <= end.year * 12 + end.month - 1)
+        return index, mask
+
+    def _reduce(self, arr, dims, by, where, months):
+        index, mask = self._selection(dims, where, months)
+        sub = arr[np.ix_(*index)].astype(np.int64)
+        if mask is not None:
+            shape = [1] * sub.ndim
+            shape[dims.index("Year")], shape[dims.index("Month")] = mask.shape
+            sub = sub * mask.reshape(shape)
+        sub = sub.sum(axis=tuple(i for i, d in enumerate(dims) if d not in by))
+        if not by:
+            return int(sub)
+        kept = [d for d in dims if d in by]
+        sub = np.transpose(sub, [kept.index(d) for d in by])
+        labels = [self.axes[d][index[dims.index(d)]] for d in by]
+        if len(by) == 1:
+            return pd.Series(sub, index=pd.Index(labels[0], name=by[0]))
+        return pd.Series(sub.ravel(), index=pd.MultiIndex.from_product(labels, names=by))
+
+    def query(self, by=(), measure="count", where=None, months=None):
+        """Sum ``measure`` grouped by the dimensions in ``by``.
+
+        ``where`` maps a dimension to the label(s) to keep, ``months`` is an
+        inclusive (start, end) month range. With an empty ``by`` a scalar
+        total is returned.
+        """
+        return self._reduce(self.measures[measure], DIMENSIONS, list(by), where, months)
+
+    def area_query(self, by=("Community Area",), where=None, months=None):
+        """Counts from the Year x Month x Primary Type x Community Area cube."""
+        return self._reduce(self.area_counts, AREA_DIMENSIONS, list(by), where, months)
+
+
+def build_cube(df, path=CUBE_PATH):
+    cube = CrimeCube.build(df)
+    cube.save(path)
+    print(f"✅ Crime cube saved → {path} ({cube.measures['count'].size:,} cells)")
+    return cube
+
+
+if __name__ == "__main__":
+    print("Loading data:", DATA_PATH)
+    build_cube(pd.read_parquet(DATA_PATH, columns=INPUT_COLUMNS))
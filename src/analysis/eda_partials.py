@@ -0,0 +1,131 @@
+# src/analysis/eda_partials.py
+"""
+eda_partials.py
+------------------------------------
+Mergeable partial states behind the EDA summary CSVs.
+
+Rows are partitioned by (Year, Month). Each partition keeps its counts and
+sums at the finest grain any summary needs:
+
+    Year, Month, Weekday, Hour, Primary Type -> count, arrests, domestic
+
+Changed partitions come from the store's metadata, not from the rows:
+ingest_delta bumps the store version and records it for every partition
+it touches, and the partials remember the store id and version they were
+built from. On a rerun only partitions with a newer version are read
+(``partition_filter``) and regrouped; a store rebuilt by clean_data has a
+new id and is regrouped in full. Every summary is a sum over the merged
+states, so the result equals grouping the whole frame.
+"""
+
+import json
+import sys
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+PARTIALS_DIR = BASE_DIR / "data" / "processed" / "eda_partials"
+
+sys.path.append(str(BASE_DIR / "src" / "data_preprocessing"))
+from clean_data import parse_partition_key
+
+PARTITION = ["Year", "Month"]
+GRAIN = PARTITION + ["Weekday", "Hour", "Primary Type"]
+MEASURES = ["count", "arrests", "domestic"]
+SEASONS = {12: "Winter", 1: "Winter", 2: "Winter", 3: "Spring", 4: "Spring", 5: "Spring",
+           6: "Summer", 7: "Summer", 8: "Summer", 9: "Fall", 10: "Fall", 11: "Fall"}
+
+
+def partition_filter(partitions):
+    """``read_parquet`` filters selecting the rows of the given (Year, Month) partitions."""
+    return [[("Year", "=", year), ("Month", "=", month)] for year, month in partitions]
+
+
+def partial_states(df):
+    """Counts and sums of ``df`` at the GRAIN of the partial states."""
+    states = df.assign(Arrest=df["Arrest"].astype(int), Domestic=df["Domestic"].astype(int),
+                       **{"Primary Type": df["Primary Type"].astype(str)})
+    states = states.groupby(GRAIN).agg(count=("Arrest", "size"), arrests=("Arrest", "sum"),
+                                       domestic=("Domestic", "sum"))
+    return states.reset_index()
+
+
+class EDAPartials:
+    def __init__(self, states, source):
+        self.states = states   # one row per non-empty GRAIN group
+        self.source = source   # store_id and version of the store the states describe
+
+    @classmethod
+    def empty(cls):
+        states = pd.DataFrame(columns=GRAIN + MEASURES).astype({c: np.int64 for c in GRAIN[:-1] + MEASURES})
+        return cls(states.astype({"Primary Type": str}), {})
+
+    @classmethod
+    def load(cls, path=PARTIALS_DIR):
+        path = Path(path)
+        if not (path / "states.parquet").exists() or not (path / "source.json").exists():
+            return cls.empty()
+        with open(path / "source.json") as f:
+            return cls(pd.read_parquet(path / "states.parquet"), json.load(f))
+
+    def save(self, path=PARTIALS_DIR):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        self.states.to_parquet(path / "states.parquet", index=False)
+        with open(path / "source.json", "w") as f:
+            json.dump(self.source, f, indent=4)
+        return path
+
+    def stale_partitions(self, metadata):
+        """(Year, Month) partitions the store changed since these states were built.
+
+        None when the states cannot be brought up to date partition by
+        partition (no states yet, or a store rebuilt since) and every
+        partition has to be regrouped.
+        """
+        store_id = metadata.get("store_id")
+        if store_id is None or self.source.get("store_id") != store_id:
+            return None
+        version = self.source.get("version", 0)
+        return sorted(parse_partition_key(key)
+                      for key, changed in metadata.get("partition_versions", {}).items() if changed > version)
+
+    def refresh(self, df, metadata, partitions=None):
+        """Regroup ``df``, the rows of ``partitions`` (every partition if None), and merge them."""
+        keep = self.states.iloc[0:0]
+        if partitions is not None:
+            codes = self.states["Year"] * 100 + self.states["Month"]
+            keep = self.states[~codes.isin([year * 100 + month for year, month in partitions])]
+        self.states = (pd.concat([keep, partial_states(df)], ignore_index=True)
+                       .astype({c: np.int64 for c in GRAIN[:-1] + MEASURES})
+                       .sort_values(GRAIN, kind="stable").reset_index(drop=True))
+        self.source = {"store_id": metadata.get("store_id"), "version": metadata.get("version", 0)}
+        return self
+
+    # ---------------- summaries ----------------
+    def _sum(self, by, measure="count"):
+        return self.states.groupby(by)[measure].sum()
+
+    def crime_counts(self):
+        return self._sum("Primary Type").sort_values(ascending=False, kind="stable")
+
+    def hourly_counts(self):
+        return self._sum("Hour").sort_index()
+
+    def hour_week_counts(self):
+        return self._sum(["Weekday", "Hour"]).unstack(fill_value=0)
+
+    def monthly_trend(self):
+        return self._sum(PARTITION).reset_index()
+
+    def season_counts(self):
+        season = self.states["Month"].map(SEASONS).rename("Season")
+        return self.states.groupby(season)["count"].sum().sort_values(ascending=False, kind="stable")
+
+    def arrest_domestic(self):
+        arrest_dom = (self.states.groupby("Primary Type")[MEASURES].sum()
+                      .rename(columns={"count": "total"}).reset_index())
+        arrest_dom["arrest_rate"] = arrest_dom["arrests"] / arrest_dom["total"]
+        arrest_dom["domestic_rate"] = arrest_dom["domestic"] / arrest_dom["total"]
+        return arrest_dom.sort_values("total", ascending=False, kind="stable")
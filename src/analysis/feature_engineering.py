@@ -3,6 +3,14 @@
 feature_engineering.py
 ------------------------------------
 Generates model-ready features for the PatrolIQ project.
+
+Fits that need the whole frame (label encoders, geo KMeans, LatBin/LonBin
+quantile edges, lat/lon scaler) live in one FeaturePipeline, saved to
+models/feature_pipeline.pkl. Its transform applies them to any batch
+without refitting; here it can run over row or year partitions in a
+process pool (--workers). With --coreset N the geo KMeans is fitted on an
+N-point weighted coreset of the coordinates (src/models/coreset.py) and
+its cost is reported against an exact run on a uniform sample.
 """
 
 import pandas as pd
@@ -10,110 +18,264 @@ import numpy as np
 from sklearn.preprocessing import MinMaxScaler, LabelEncoder
 from sklearn.cluster import KMeans
 from pathlib import Path
+from joblib import Parallel, delayed
+import argparse
 import joblib
+import sys
 
 BASE_DIR = Path(__file__).resolve().parents[2]
-DATA_PATH_01 = BASE_DIR / "data" / "processed" / "sample_250000_rows_01.csv"
-DATA_PATH_02 = BASE_DIR / "data" / "processed" / "sample_250000_rows_02.csv"
+DATA_PATH = BASE_DIR / "data" / "processed" / "sample_500000_rows.parquet"
 OUTPUT_PATH = BASE_DIR / "data" / "processed" / "model_ready_data.csv"
 MODEL_DIR = BASE_DIR / "models"
 MODEL_DIR.mkdir(exist_ok=True, parents=True)
+PIPELINE_PATH = MODEL_DIR / "feature_pipeline.pkl"
+
+sys.path.append(str(BASE_DIR / "src" / "models"))
+from coreset import StreamingCoreset, approximation_error
+
+# Raw columns read by engineer_features (column projection on the Parquet store)
+INPUT_COLUMNS = [
+    "Year", "Month", "Day", "Hour", "Weekday", "Primary Type",
+    "Location Description", "District", "Ward", "Community Area",
+    "Latitude", "Longitude", "Arrest"
+]
+
+FEATURE_COLUMNS = [
+    "Year","Month","Day","Hour","Weekday","IsWeekend",
+    "CrimeLabel","LocationLabel","SeasonLabel","TimeLabel",
+    "Severity","District","Ward","Community Area",
+    "GeoCluster","LatBin","LonBin","LatNorm","LonNorm","Arrest"
+]
+TIME_OF_DAY_BINS = [0, 6, 12, 18, 24]
+TIME_OF_DAY_LABELS = ["Night", "Morning", "Afternoon", "Evening"]
+ENCODED_COLUMNS = {  # encoded column -> fitted LabelEncoder file
+    "CrimeLabel": "label_crime.pkl",
+    "LocationLabel": "label_location.pkl",
+    "SeasonLabel": "label_season.pkl",
+    "TimeLabel": "label_time.pkl",
+}
+CHUNK_ROWS = 100000  # rows per partition of the parallel mode
+
+
+SEVERITY_MAP = {
+    "HOMICIDE": 5, "CRIM SEXUAL ASSAULT": 5, "CRIMINAL SEXUAL ASSAULT": 5,
+    "KIDNAPPING": 5, "HUMAN TRAFFICKING": 5,
+    "ASSAULT": 4, "BATTERY": 4, "ROBBERY": 4, "ARSON": 4,
+    "WEAPONS VIOLATION": 4, "INTIMIDATION": 4, "STALKING": 4,
+    "OFFENSE INVOLVING CHILDREN": 4,
+    "BURGLARY": 3, "MOTOR VEHICLE THEFT": 3, "CRIMINAL DAMAGE": 3,
+    "CRIMINAL TRESPASS": 3, "INTERFERENCE WITH PUBLIC OFFICER": 3,
+    "CONCEALED CARRY LICENSE VIOLATION": 3,
+    "THEFT": 2, "DECEPTIVE PRACTICE": 2, "NARCOTICS": 2,
+    "OTHER OFFENSE": 2, "OTHER NARCOTIC VIOLATION": 2,
+    "PUBLIC PEACE VIOLATION": 2, "SEX OFFENSE": 2,
+    "LIQUOR LAW VIOLATION": 2,
+    "GAMBLING": 1, "PROSTITUTION": 1, "PUBLIC INDECENCY": 1,
+    "OBSCENITY": 1,
+    "NON-CRIMINAL": 0
+}
+DEFAULT_SEVERITY = 1
+
+# Lookup tables indexed by month (1-12) and hour (0-23)
+SEASON_BY_MONTH = np.array(["", "Winter", "Winter", "Spring", "Spring", "Spring", "Summer",
+                            "Summer", "Summer", "Fall", "Fall", "Fall", "Winter"], dtype=object)
+TIME_OF_DAY_BY_HOUR = np.repeat(np.arange(len(TIME_OF_DAY_LABELS)), np.diff(TIME_OF_DAY_BINS))
 
 
 def assign_season(month):
-    if month in [12, 1, 2]: return "Winter"
-    elif month in [3, 4, 5]: return "Spring"
-    elif month in [6, 7, 8]: return "Summer"
-    return "Fall"
+    return SEASON_BY_MONTH[month]
 
 
 def create_crime_severity(type_):
-    severity_map = {
-        "HOMICIDE": 5, "CRIM SEXUAL ASSAULT": 5, "CRIMINAL SEXUAL ASSAULT": 5,
-        "KIDNAPPING": 5, "HUMAN TRAFFICKING": 5,
-        "ASSAULT": 4, "BATTERY": 4, "ROBBERY": 4, "ARSON": 4,
-        "WEAPONS VIOLATION": 4, "INTIMIDATION": 4, "STALKING": 4,
-        "OFFENSE INVOLVING CHILDREN": 4,
-        "BURGLARY": 3, "MOTOR VEHICLE THEFT": 3, "CRIMINAL DAMAGE": 3,
-        "CRIMINAL TRESPASS": 3, "INTERFERENCE WITH PUBLIC OFFICER": 3,
-        "CONCEALED CARRY LICENSE VIOLATION": 3,
-        "THEFT": 2, "DECEPTIVE PRACTICE": 2, "NARCOTICS": 2,
-        "OTHER OFFENSE": 2, "OTHER NARCOTIC VIOLATION": 2,
-        "PUBLIC PEACE VIOLATION": 2, "SEX OFFENSE": 2,
-        "LIQUOR LAW VIOLATION": 2,
-        "GAMBLING": 1, "PROSTITUTION": 1, "PUBLIC INDECENCY": 1,
-        "OBSCENITY": 1,
-        "NON-CRIMINAL": 0
-    }
-    return severity_map.get(type_, 1)
-
-
-def engineer_features(df):
-    print("✅ Starting feature engineering...")
+    return SEVERITY_MAP.get(type_, DEFAULT_SEVERITY)
 
-    # --- Temporal ---
-    df["Season"] = df["Month"].apply(assign_season)
-    df["IsWeekend"] = df["Weekday"].isin([5, 6]).astype(int)
-    df["TimeOfDay"] = pd.cut(df["Hour"], bins=[0,6,12,18,24], 
-                             labels=["Night","Morning","Afternoon","Evening"], 
-                             right=False)
-
-    # --- Crime Severity ---
-    df["Severity"] = df["Primary Type"].apply(create_crime_severity)
-
-    # --- Label Encoding ---
-    le_crime = LabelEncoder()
-    le_loc = LabelEncoder()
-    le_season = LabelEncoder()
-    le_time = LabelEncoder()
-
-    df["CrimeLabel"] = le_crime.fit_transform(df["Primary Type"])
-    df["LocationLabel"] = le_loc.fit_transform(df["Location Description"].fillna("Unknown"))
-    df["SeasonLabel"] = le_season.fit_transform(df["Season"])
-    df["TimeLabel"] = le_time.fit_transform(df["TimeOfDay"])
-
-    joblib.dump(le_crime, MODEL_DIR / "label_crime.pkl")
-    joblib.dump(le_loc, MODEL_DIR / "label_location.pkl")
-    joblib.dump(le_season, MODEL_DIR / "label_season.pkl")
-    joblib.dump(le_time, MODEL_DIR / "label_time.pkl")
-
-    # --- Geo Clustering ---
-    coords = df[["Latitude","Longitude"]].dropna()
-    kmeans = KMeans(n_clusters=12, random_state=42, n_init=10)
-    kmeans.fit(coords)
-    df["GeoCluster"] = kmeans.predict(df[["Latitude","Longitude"]].fillna(method='ffill'))
-    joblib.dump(kmeans, MODEL_DIR / "geo_cluster.pkl")
-
-    # --- Binning + Normalization ---
-    df["LatBin"] = pd.qcut(df["Latitude"], 20, duplicates="drop", labels=False)
-    df["LonBin"] = pd.qcut(df["Longitude"], 20, duplicates="drop", labels=False)
-
-    scaler = MinMaxScaler()
-    df[["LatNorm","LonNorm"]] = scaler.fit_transform(df[["Latitude","Longitude"]])
-    joblib.dump(scaler, MODEL_DIR / "latlon_scaler.pkl")
 
-    print("✅ Feature engineering completed")
+# ---------------- vectorized column transforms ----------------
+def season_labels(month):
+    """Season name of every month number."""
+    return pd.Series(SEASON_BY_MONTH[np.asarray(month, dtype=np.int64)], index=month.index, dtype="str")
+
+
+def severity_scores(primary_type):
+    """Severity of every crime type: one dict lookup per category, then a code lookup."""
+    types = primary_type.astype("category")
+    scores = np.array([SEVERITY_MAP.get(t, DEFAULT_SEVERITY) for t in types.cat.categories] + [DEFAULT_SEVERITY])
+    return pd.Series(scores[types.cat.codes.to_numpy()], index=primary_type.index)  # code -1 (NaN) -> default
+
+
+def time_of_day(hour):
+    """TimeOfDay bucket of every hour, the same ordered categorical as pd.cut on TIME_OF_DAY_BINS."""
+    hour = np.asarray(hour, dtype=np.int64)
+    inside = (hour >= TIME_OF_DAY_BINS[0]) & (hour < TIME_OF_DAY_BINS[-1])
+    codes = np.where(inside, TIME_OF_DAY_BY_HOUR[np.where(inside, hour, 0)], -1)
+    return pd.Categorical.from_codes(codes, categories=TIME_OF_DAY_LABELS, ordered=True)
+
+
+# ---------------- fitted pipeline ----------------
+class FeaturePipeline:
+    """Every fitted piece of feature engineering, fitted once and reused.
+
+    ``fit`` needs the whole frame (label encoders, geo KMeans, LatBin/LonBin
+    quantile edges, lat/lon scaler); ``transform`` only applies them, row by
+    row, so a new batch is scored without refitting. Saved as one pickle.
+    """
+
+    def __init__(self, encoders=None, geo_cluster=None, edges=None, scaler=None):
+        self.encoders = encoders        # encoded column -> LabelEncoder
+        self.geo_cluster = geo_cluster  # KMeans on Latitude/Longitude
+        self.edges = edges              # "Latitude"/"Longitude" -> LatBin/LonBin edges
+        self.scaler = scaler            # MinMaxScaler of Latitude/Longitude
+
+    def fit(self, df, coreset=0):
+        self.encoders = {column: LabelEncoder() for column in ENCODED_COLUMNS}
+        self.encoders["CrimeLabel"].fit(df["Primary Type"])
+        self.encoders["LocationLabel"].fit(df["Location Description"].fillna("Unknown"))
+        # the classes of the derived columns follow from the distinct months / hours
+        self.encoders["SeasonLabel"].fit(season_labels(pd.Series(df["Month"].unique())))
+        self.encoders["TimeLabel"].fit(time_of_day(df["Hour"].unique()))
+
+        coords = df[["Latitude","Longitude"]].dropna()
+        self.geo_cluster = KMeans(n_clusters=12, random_state=42, n_init=10)
+        if coreset:
+            builder = StreamingCoreset(coreset)
+            for start in range(0, len(coords), CHUNK_ROWS):
+                builder.add(coords.iloc[start:start + CHUNK_ROWS].to_numpy(dtype=np.float64))
+            points, weights = builder.coreset()
+            self.geo_cluster.fit(pd.DataFrame(points, columns=coords.columns), sample_weight=weights)
+            error = approximation_error(builder.benchmark, self.geo_cluster.cluster_centers_)
+            print(f"✅ GeoCluster fitted on a {len(points):,}-point coreset: {error['relative_error']:+.2%} cost"
+                  f" vs an exact run on {error['benchmark_rows']:,} sampled rows")
+        else:
+            self.geo_cluster.fit(coords)
+        del self.geo_cluster.labels_  # per-row training labels; predict needs only the centers
+
+        # same edges (and bins) as pd.qcut(..., 20, duplicates="drop")
+        self.edges = {c: pd.qcut(df[c], 20, duplicates="drop", retbins=True)[1] for c in ["Latitude", "Longitude"]}
 
-    feature_cols = [
-        "Year","Month","Day","Hour","Weekday","IsWeekend",
-        "CrimeLabel","LocationLabel","SeasonLabel","TimeLabel",
-        "Severity","District","Ward","Community Area",
-        "GeoCluster","LatBin","LonBin","LatNorm","LonNorm","Arrest"
-    ]
+        self.scaler = MinMaxScaler()
+        self.scaler.fit(df[["Latitude","Longitude"]])
+        return self
 
-    out_df = df[feature_cols]
+    def extend(self, df):
+        """Append classes unseen at fit time to the label encoders (codes already
+        given keep their value). Returns the number of classes added."""
+        added = 0
+        for column, values in self._encoder_inputs(self._derived(df)).items():
+            encoder = self.encoders[column]
+            values = pd.Series(values).astype(str)
+            unseen = pd.unique(values[~values.isin(encoder.classes_)])
+            encoder.classes_ = np.concatenate([encoder.classes_, unseen.astype(encoder.classes_.dtype)])
+            added += len(unseen)
+        return added
+
+    @staticmethod
+    def _derived(df):
+        df = df.copy()
+        # --- Temporal ---
+        df["Season"] = season_labels(df["Month"])
+        df["IsWeekend"] = (df["Weekday"] >= 5).astype(int)
+        df["TimeOfDay"] = time_of_day(df["Hour"])
+
+        # --- Crime Severity ---
+        df["Severity"] = severity_scores(df["Primary Type"])
+        return df
+
+    @staticmethod
+    def _encoder_inputs(df):
+        return {"CrimeLabel": df["Primary Type"], "LocationLabel": df["Location Description"].fillna("Unknown"),
+                "SeasonLabel": df["Season"], "TimeLabel": df["TimeOfDay"]}
+
+    def transform(self, df, geo_coords=None):
+        """Model-ready rows of ``df``.
+
+        Every output row depends on its own input row only, so any split of the
+        rows gives the same result. ``geo_coords`` are the coordinates GeoCluster
+        is predicted from (default: forward-filled Latitude/Longitude of ``df``).
+        Coordinates outside the fitted range go to the first / last LatBin/LonBin.
+        """
+        df = self._derived(df)
+
+        # --- Label Encoding ---
+        for column, values in self._encoder_inputs(df).items():
+            df[column] = self.encoders[column].transform(values)
+
+        # --- Geo Clustering ---
+        if geo_coords is None:
+            geo_coords = df[["Latitude","Longitude"]].ffill()
+        df["GeoCluster"] = self.geo_cluster.predict(geo_coords)
+
+        # --- Binning + Normalization ---
+        for column, source in [("LatBin", "Latitude"), ("LonBin", "Longitude")]:
+            edges = self.edges[source]
+            df[column] = pd.cut(df[source].clip(edges[0], edges[-1]), edges, labels=False, include_lowest=True)
+        df[["LatNorm","LonNorm"]] = self.scaler.transform(df[["Latitude","Longitude"]])
+        return df[FEATURE_COLUMNS]
+
+    def save(self, path=PIPELINE_PATH):
+        # plain state, so loading does not depend on the module this class ran from
+        joblib.dump(vars(self), path)
+        # the individual models are still written for anything that loads them directly
+        for column, file in ENCODED_COLUMNS.items():
+            joblib.dump(self.encoders[column], MODEL_DIR / file)
+        joblib.dump(self.geo_cluster, MODEL_DIR / "geo_cluster.pkl")
+        joblib.dump(self.scaler, MODEL_DIR / "latlon_scaler.pkl")
+        return path
+
+    @classmethod
+    def load(cls, path=PIPELINE_PATH):
+        return cls(**joblib.load(path))
+
+
+def _partitions(df, partition, chunksize):
+    """Row positions of each partition: consecutive row chunks, or one per Year."""
+    if partition == "year":
+        return list(df.groupby("Year", sort=True).indices.values())
+    return np.array_split(np.arange(len(df)), max(1, -(-len(df) // chunksize)))
+
+
+def engineer_features(df, workers=1, partition="rows", chunksize=CHUNK_ROWS, coreset=0):
+    """Fit the global transforms once, then transform the rows.
+
+    With ``workers`` > 1 the rows are split into partitions (row chunks or
+    years) that are transformed in a process pool; the fitted state is sent
+    to every worker and the partitions are put back in row order, so the
+    output is identical to the serial path.
+    """
+    print("✅ Starting feature engineering...")
+    pipeline = FeaturePipeline().fit(df, coreset)
+    pipeline.save()
+    # forward-fill runs over the whole frame so partition edges do not change it
+    geo_coords = df[["Latitude","Longitude"]].ffill()
+
+    if workers == 1:
+        out_df = pipeline.transform(df, geo_coords)
+    else:
+        parts = _partitions(df, partition, chunksize)
+        print(f"🔹 Transforming {len(parts)} {partition} partition(s) on {workers} workers...")
+        out = Parallel(n_jobs=workers)(
+            delayed(pipeline.transform)(df.iloc[rows], geo_coords.iloc[rows]) for rows in parts)
+        out_df = pd.concat(out).loc[df.index]
+
+    print("✅ Feature engineering completed")
     print("✅ Final shape:", out_df.shape)
     return out_df
 
 
 if __name__ == "__main__":
-    print("Loading data:", DATA_PATH_01)
-    df_01 = pd.read_csv(DATA_PATH_01, low_memory=False)
-    print("Loading data:", DATA_PATH_01)
-    df_02 = pd.read_csv(DATA_PATH_02, low_memory=False)
+    parser = argparse.ArgumentParser(description="Generate model-ready features")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes for the per-row transforms (1 = serial)")
+    parser.add_argument("--partition", choices=["rows", "year"], default="rows",
+                        help="split the rows into fixed-size chunks or by Year")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS,
+                        help="rows per partition with --partition rows")
+    parser.add_argument("--coreset", type=int, default=0,
+                        help="fit the geo KMeans on a weighted coreset of this many points (0 = all rows)")
+    args = parser.parse_args()
 
-    df = pd.concat([df_01, df_02], ignore_index=True)
+    print("Loading data:", DATA_PATH)
+    df = pd.read_parquet(DATA_PATH, columns=INPUT_COLUMNS)
     print ("Total_rows:", len(df))
-    final_df = engineer_features(df)
+    final_df = engineer_features(df, args.workers, args.partition, args.chunksize, args.coreset)
     final_df.to_csv(OUTPUT_PATH, index=False)
-    print(f"✅ Saved model-ready data: {OUTPUT_PATH}")
\ No newline at end of file
+    print(f"✅ Saved model-ready data: {OUTPUT_PATH}")
@@ -0,0 +1,240 @@
+# src/analysis/tile_pyramid.py
+"""
+tile_pyramid.py
+------------------------------------
+Multi-resolution (quadtree) pyramid of crime counts, precomputed at build time.
+
+Each zoom level holds the non-empty spatial_bins cells of that zoom, split by
+Primary Type and Year:  x, y, type, year, count  (sorted by map tile).
+Cells nest exactly (a cell at zoom z-1 is four cells at zoom z), so every
+level is aggregated from the one below it instead of from the rows.
+
+A map at any zoom / type / year combination is read from the tiles it covers
+(TILE_CELLS x TILE_CELLS cells per 256 px tile) instead of re-binning rows.
+"""
+
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+from spatial_bins import CELL_PIXELS, TILE_PIXELS, cell_index, count_cells, mercator_pixels, pixels_to_latlon
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_PATH = BASE_DIR / "data" / "processed" / "sample_500000_rows.parquet"
+PYRAMID_PATH = BASE_DIR / "data" / "processed" / "tile_pyramid.npz"
+
+ZOOMS = range(9, 16)  # the zoom levels offered by the Geographic Heatmaps page
+TILE_CELLS = TILE_PIXELS // CELL_PIXELS
+FIELDS = ["x", "y", "type", "year", "count"]
+FIELD_DTYPES = {"x": np.uint32, "y": np.uint32, "type": np.uint8, "year": np.uint8, "count": np.uint32}
+INPUT_COLUMNS = ["Date", "Primary Type", "Latitude", "Longitude"]
+
+
+def _tile_keys(x, y, zoom):
+    """Row-major tile number of each cell (tiles are 2**zoom per side)."""
+    return (np.asarray(x, dtype=np.int64) // TILE_CELLS << zoom) + np.asarray(y, dtype=np.int64) // TILE_CELLS
+
+
+def _level(x, y, type_code, year_code, counts, zoom):
+    """Level arrays sorted by tile, plus the tile index (keys, start offsets)."""
+    keys = _tile_keys(x, y, zoom)
+    order = np.argsort(keys, kind="stable")
+    level = {f: np.asarray(v)[order].astype(FIELD_DTYPES[f])
+             for f, v in zip(FIELDS, (x, y, type_code, year_code, counts))}
+    level["tile_keys"], level["tile_offsets"] = np.unique(keys[order], return_index=True)
+    return level
+
+
+class TilePyramid:
+    def __init__(self, axes, levels):
+        self.axes = axes      # "Primary Type" / "Year" -> sorted label array
+        self.levels = levels  # zoom -> dict of level arrays
+
+    @property
+    def zooms(self):
+        return sorted(self.levels)
+
+    # ---------------- build / persist ----------------
+    @classmethod
+    def build(cls, df, zooms=ZOOMS):
+        lat = df["Latitude"].to_numpy(dtype=np.float64)
+        lon = df["Longitude"].to_numpy(dtype=np.float64)
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        types = df["Primary Type"].astype(str).to_numpy(dtype=str)[valid]
+        years = pd.to_datetime(df["Date"]).dt.year.to_numpy()[valid]
+        axes = {"Primary Type": np.unique(types), "Year": np.unique(years)}
+        n_years = len(axes["Year"])
+
+        # Finest level from the rows; type and year travel as one group code
+        zooms = sorted(zooms)
+        groups = np.searchsorted(axes["Primary Type"], types) * n_years + np.searchsorted(axes["Year"], years)
+        ix, iy = cell_index(lat[valid], lon[valid], zooms[-1])
+        x, y, g, counts = count_cells(ix, iy, groups)
+
+        levels = {}
+        for zoom in reversed(zooms):
+            if zoom != zooms[-1]:
+                # parent cell = child cell // 2 per zoom step
+                shift = prev_zoom - zoom
+                x, y, g, counts = count_cells(x >> shift, y >> shift, g, weights=counts)
+                counts = counts.astype(np.int64)
+            levels[zoom] = _level(x, y, *np.divmod(g, n_years), counts, zoom)
+            prev_zoom = zoom
+        return cls(axes, levels)
+
+    def update(self, added, removed=None):
+        """Add the rows of ``added`` and subtract those of ``removed``, in place.
+
+        Only the tiles the changed rows fall in are re-aggregated (see
+        ``_merge_tiles``), so the cost follows the number of changed rows.
+        Raises KeyError for a crime type or year missing from the axes
+        (rebuild the pyramid then).
+        """
+        n_years = len(self.axes["Year"])
+        changes = []
+        for sign, df in [(1, added), (-1, removed)]:
+            if df is None or not len(df):
+                continue
+            lat = df["Latitude"].to_numpy(dtype=np.float64)
+            lon = df["Longitude"].to_numpy(dtype=np.float64)
+            valid = ~(np.isnan(lat) | np.isnan(lon))
+            types = df["Primary Type"].astype(str).to_numpy(dtype=str)[valid]
+            years = pd.to_datetime(df["Date"]).dt.year.to_numpy()[valid]
+            codes = []
+            for values, axis in [(types, self.axes["Primary Type"]), (years, self.axes["Year"])]:
+                code = np.minimum(np.searchsorted(axis, values), len(axis) - 1)
+                if (axis[code] != values).any():
+                    raise KeyError(f"not on pyramid axis: {np.unique(values[axis[code] != values])[:5]}")
+                codes.append(code)
+            changes.append((sign, lat[valid], lon[valid], codes[0] * n_years + codes[1]))
+        if not changes:
+            return self
+
+        for zoom in self.levels:
+            cells = [cell_index(lat, lon, zoom) for _, lat, lon, _ in changes]
+            x, y, g, counts = count_cells(np.concatenate([ix for ix, _ in cells]),
+                                          np.concatenate([iy for _, iy in cells]),
+                                          np.concatenate([groups for *_, groups in changes]),
+                                          weights=np.concatenate([np.full(len(groups), float(sign))
+                                                                  for sign, *_, groups in changes]))
+            keep = counts != 0
+            self._merge_tiles(zoom, x[keep], y[keep], g[keep], counts[keep])
+        return self
+
+    def _merge_tiles(self, zoom, x, y, g, counts):
+        """Add signed cell counts to one level, re-aggregating only the tiles they fall in.
+
+        When the touched tiles keep the same cells, their counts are updated
+        in place. Otherwise their rows are replaced by the merged cells and
+        the level arrays are spliced (a copy, but no re-aggregation or sort).
+        """
+        level, n_years = self.levels[zoom], len(self.axes["Year"])
+        keys, offsets = level["tile_keys"], level["tile_offsets"]
+        ends = np.append(offsets[1:], len(level["count"]))
+        touched = np.unique(_tile_keys(x, y, zoom))
+        found = np.minimum(np.searchsorted(keys, touched), max(len(keys) - 1, 0))
+        found = found[keys[found] == touched] if len(keys) else found[:0]
+        rows = (np.concatenate([np.arange(offsets[i], ends[i]) for i in found])
+                if len(found) else np.empty(0, dtype=np.int64))
+
+        old_groups = level["type"][rows].astype(np.int64) * n_years + level["year"][rows]
+        mx, my, mg, merged = count_cells(np.concatenate([level["x"][rows].astype(np.int64), x]),
+                                         np.concatenate([level["y"][rows].astype(np.int64), y]),
+                                         np.concatenate([old_groups, g]),
+                                         weights=np.concatenate([level["count"][rows].astype(np.float64), counts]))
+        keep = merged > 0
+        tiles = _level(mx[keep], my[keep], *np.divmod(mg[keep], n_years), merged[keep].astype(np.int64), zoom)
+
+        same_cells = len(tiles["count"]) == len(rows) and all(
+            np.array_equal(tiles[f], level[f][rows]) for f in ["x", "y", "type", "year"])
+        if same_cells:
+            level["count"][rows] = tiles["count"]
+            return
+
+        row_keys = np.repeat(keys, ends - offsets)
+        remaining = np.ones(len(row_keys), dtype=bool)
+        remaining[rows] = False
+        new_keys = _tile_keys(tiles["x"], tiles["y"], zoom)
+        at = np.searchsorted(row_keys[remaining], new_keys)
+        for f in FIELDS:
+            level[f] = np.insert(level[f][remaining], at, tiles[f])
+        row_keys = np.insert(row_keys[remaining], at, new_keys)
+        starts = np.flatnonzero(np.diff(row_keys, prepend=-1))
+        level["tile_keys"], level["tile_offsets"] = row_keys[starts], starts
+
+    def save(self, path=PYRAMID_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {f"axis/{d}": a for d, a in self.axes.items()}
+        for zoom, level in self.levels.items():
+            arrays.update({f"z{zoom}/{k}": a for k, a in level.items()})
+        np.savez_compressed(path, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path=PYRAMID_PATH):
+        axes, levels = {}, {}
+        with np.load(path, allow_pickle=False) as z:
+            for k in z.files:
+                group, name = k.split("/", 1)
+                if group == "axis":
+                    axes[name] = z[k]
+                else:
+                    levels.setdefault(int(group[1:]), {})[name] = z[k]
+        return cls(axes, levels)
+
+    # ---------------- queries ----------------
+    def tile_rows(self, zoom, bounds=None):
+        """Row positions of a level covering ``bounds`` (south, west, north, east)."""
+        level = self.levels[zoom]
+        if bounds is None:
+            return np.arange(len(level["count"]))
+        south, west, north, east = bounds
+        (x0, x1), (y0, y1) = (np.floor(np.asarray(v) / TILE_PIXELS).astype(np.int64)
+                              for v in mercator_pixels([north, south], [west, east], zoom))
+        keys, offsets = level["tile_keys"], level["tile_offsets"]
+        ends = np.append(offsets[1:], len(level["count"]))
+        # tiles of one column are consecutive keys, so each column is one key range
+        columns = (np.arange(x0, x1 + 1) << zoom)
+        lo = np.searchsorted(keys, columns + y0, "left")
+        hi = np.searchsorted(keys, columns + y1, "right")
+        spans = [np.arange(offsets[a], ends[b - 1]) for a, b in zip(lo, hi) if b > a]
+        return np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+
+    def query(self, zoom, primary_type=None, years=None, bounds=None, by_type=False):
+        """Cell counts of one zoom level, like ``spatial_bins.bin_points``.
+
+        ``primary_type`` and ``years`` restrict to the given label(s),
+        ``bounds`` to the tiles intersecting a lat/lon box. With ``by_type``
+        each cell is split per Primary Type.
+        """
+        level = self.levels[zoom]
+        rows = self.tile_rows(zoom, bounds)
+        keep = np.ones(len(rows), dtype=bool)
+        for field, axis, labels in [("type", "Primary Type", primary_type), ("year", "Year", years)]:
+            if labels is not None:
+                codes = np.flatnonzero(np.isin(self.axes[axis], np.atleast_1d(labels)))
+                keep &= np.isin(level[field][rows], codes)
+        rows = rows[keep]
+
+        groups = level["type"][rows] if by_type else None
+        x, y, g, counts = count_cells(level["x"][rows].astype(np.int64), level["y"][rows].astype(np.int64),
+                                      groups, weights=level["count"][rows])
+        lat, lon = pixels_to_latlon((x + 0.5) * CELL_PIXELS, (y + 0.5) * CELL_PIXELS, zoom)
+        cells = pd.DataFrame({"Latitude": lat, "Longitude": lon, "count": counts.astype(np.int64)})
+        if by_type:
+            cells["Primary Type"] = self.axes["Primary Type"][g]
+        return cells
+
+
+def build_pyramid(df, path=PYRAMID_PATH, zooms=ZOOMS):
+    pyramid = TilePyramid.build(df, zooms)
+    pyramid.save(path)
+    n_cells = sum(len(level["count"]) for level in pyramid.levels.values())
+    print(f"✅ Tile pyramid saved → {path} (zoom {min(zooms)}-{max(zooms)}, {n_cells:,} cells)")
+    return pyramid
+
+
+if __name__ == "__main__":
+    print("Loading data:", DATA_PATH)
+    build_pyramid(pd.read_parquet(DATA_PATH, columns=INPUT_COLUMNS))
@@ -0,0 +1,164 @@
+"""
+PatrolIQ - Shared Data Access
+------------------------------------------
+Single process-wide copy of the processed crime dataset for all dashboard pages.
+"""
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+import pyarrow.parquet as pq
+from pathlib import Path
+import sys
+
+# ======================================================
+# PATHS
+# ======================================================
+BASE_DIR = Path(__file__).resolve().parents[2]
+DATA_PATH = BASE_DIR / "data" / "processed" / "sample_500000_rows.parquet"
+
+sys.path.append(str(BASE_DIR / "src" / "analysis"))
+from crime_cube import CUBE_PATH, CrimeCube
+from tile_pyramid import PYRAMID_PATH, TilePyramid
+
+SEASON_BY_MONTH = {
+    12: "Winter", 1: "Winter", 2: "Winter",
+    3: "Spring", 4: "Spring", 5: "Spring",
+    6: "Summer", 7: "Summer", 8: "Summer",
+    9: "Fall", 10: "Fall", 11: "Fall"
+}
+SEASONS = ["Winter", "Spring", "Summer", "Fall"]
+EPOCH_COLUMN = "DateEpoch"  # int64 seconds since 1970
+
+# Pages get projections and row selections of one shared frame and must treat
+# them as read-only: derive new frames (assign, groupby, .copy()) instead of
+# writing in place. Under Copy-on-Write (always on from pandas 3) a write would
+# copy first anyway; on older pandas a positional slice can still be a view.
+
+
+# ======================================================
+# SHARED FRAME
+# ======================================================
+def data_available():
+    return DATA_PATH.exists()
+
+
+def _to_epoch(value):
+    return (value - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+
+
+@st.cache_resource(show_spinner=False)
+def _load_frame():
+    """Parse the store once per process; shared by every page and session.
+
+    Rows keep the store order, so positional views such as
+    ``.sample(random_state=42)`` are unchanged; the date order lives in
+    ``_date_index``.
+    """
+    df = pd.read_parquet(DATA_PATH)
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df = df.dropna(subset=["Date"]).reset_index(drop=True)
+    df[EPOCH_COLUMN] = _to_epoch(df["Date"])
+
+    for col, accessor in [("Year", "year"), ("Month", "month"), ("Day", "day"),
+                          ("Hour", "hour"), ("Weekday", "weekday")]:
+        if col not in df.columns:
+            df[col] = getattr(df["Date"].dt, accessor)
+
+    df["Season"] = pd.Categorical(df["Month"].map(SEASON_BY_MONTH), categories=SEASONS)
+    return df
+
+
+def load_data(columns=None):
+    """Return the shared frame, projected to ``columns`` when given.
+
+    The result is read-only by contract (see above); under Copy-on-Write it
+    shares the cached buffers. Requested columns missing from the store are skipped.
+    """
+    df = _load_frame()
+    if columns is None:
+        return df[df.columns.tolist()]
+    return df[[c for c in columns if c in df.columns]]
+
+
+@st.cache_resource(show_spinner=False)
+def _date_index():
+    """Row positions in Date order (stable) and the matching ascending epochs."""
+    epoch = _load_frame()[EPOCH_COLUMN].to_numpy()
+    order = np.argsort(epoch, kind="stable")
+    return order, epoch[order]
+
+
+@st.cache_resource(show_spinner=False)
+def _type_rows():
+    """Primary Type -> ascending ranks in the Date order of ``_date_index``."""
+    order, _ = _date_index()
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    rows = _load_frame().groupby("Primary Type", observed=True).indices
+    return {crime_type: np.sort(rank[positions]) for crime_type, positions in rows.items()}
+
+
+def crime_types():
+    return sorted(_type_rows())
+
+
+def date_bounds(start=None, end=None):
+    """Ranks [lo, hi) in the Date order of ``_date_index`` with start <= Date < end + 1 day."""
+    _, epoch = _date_index()
+    lo = 0 if start is None else int(np.searchsorted(epoch, _to_epoch(pd.Timestamp(start)), "left"))
+    hi = len(epoch) if end is None else int(np.searchsorted(
+        epoch, _to_epoch(pd.Timestamp(end) + pd.Timedelta(days=1)), "left"))
+    return lo, hi
+
+
+def select_rows(columns=None, start=None, end=None, primary_type=None):
+    """Rows between two dates (inclusive) and optionally of one Primary Type.
+
+    The date filter is a slice [lo, hi) of the Date-ordered positions found
+    with two binary searches. The crime-type filter narrows the precomputed
+    ranks of that type to [lo, hi) with two more, so neither filter scans the
+    frame. Selected rows are returned in store order.
+    """
+    df = load_data(columns)
+    lo, hi = date_bounds(start, end)
+    order, _ = _date_index()
+    if primary_type is None:
+        if lo == 0 and hi == len(order):
+            return df
+        ranks = slice(lo, hi)
+    else:
+        ranks = _type_rows().get(primary_type, np.empty(0, dtype=np.intp))
+        ranks = ranks[np.searchsorted(ranks, lo):np.searchsorted(ranks, hi)]
+    return df.iloc[np.sort(order[ranks])]
+
+
+@st.cache_resource(show_spinner=False)
+def load_cube():
+    """Pre-aggregated count cube; built from the shared frame if eda_pipeline hasn't run."""
+    if CUBE_PATH.exists():
+        return CrimeCube.load(CUBE_PATH)
+    return CrimeCube.build(_load_frame())
+
+
+@st.cache_resource(show_spinner=False)
+def load_pyramid():
+    """Precomputed map tile pyramid; built from the shared frame if eda_pipeline hasn't run."""
+    if PYRAMID_PATH.exists():
+        return TilePyramid.load(PYRAMID_PATH)
+    return TilePyramid.build(_load_frame())
+
+
+@st.cache_data(show_spinner=False)
+def load_missing_counts():
+    """Per-column null counts from the Parquet footer statistics (no column reads)."""
+    metadata = pq.ParquetFile(DATA_PATH).metadata
+    counts = {}
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        for j in range(row_group.num_columns):
+            column = row_group.column(j)
+            stats = column.statistics
+            null_count = stats.null_count if stats is not None and stats.has_null_count else 0
+            counts[column.path_in_schema] = counts.get(column.path_in_schema, 0) + null_count
+    return pd.Series(counts)
@@ -10,6 +10,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
 import json
+import sys
 import streamlit.components.v1 as components
 
 # ======================================================
@@ -27,6 +28,11 @@ CENTERS_PATH = REPORTS_DIR / "kmeans_geo_centers_k9.csv"
 MAP_PATH = FIGURES_DIR / "map_dbscan_geo.html"
 DENDRO_PATH = FIGURES_DIR / "dendrogram_geo.png"
 
+sys.path.append(str(BASE_DIR / "src" / "models"))
+from reachability import REACHABILITY_PATH, Reachability
+
+MAP_POINTS = 20000  # points drawn on the interactive DBSCAN map
+
 # ======================================================
 # PAGE CONFIG
 # ======================================================
@@ -427,6 +433,12 @@ def load_csv(path):
         return pd.read_csv(path)
     return None
 
+@st.cache_resource(show_spinner=False)
+def load_reachability():
+    if REACHABILITY_PATH.exists():
+        return Reachability.load(REACHABILITY_PATH)
+    return None
+
 geo_metrics = load_json(GEO_METRICS)
 temp_metrics = load_json(TEMP_METRICS)
 temp_summary = load_csv(TEMP_SUMMARY)
@@ -504,6 +516,36 @@ with tab2:
 
         st.info("🔍 DBSCAN finds natural crime density clusters and filters outliers effectively.")
 
+        reach = load_reachability()
+        if reach is not None:
+            st.subheader("🎚️ Re-cluster at any eps")
+            default_eps = min(geo_metrics["dbscan"].get("eps", 0.005), reach.max_eps)
+            eps = st.slider("eps (neighbourhood radius)", min_value=reach.max_eps / 40, max_value=reach.max_eps,
+                            value=default_eps, step=reach.max_eps / 40, format="%.5f")
+            # read off the saved reachability ordering in one linear pass, no refit
+            labels = reach.labels(eps)
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Clusters", f"{labels.max() + 1:,}")
+            with col2:
+                st.metric("Noise Ratio", f"{(labels == -1).mean():.1%}")
+            with col3:
+                st.metric("Min Samples", f"{reach.min_samples}")
+
+            lat_col, lon_col = reach.columns
+            shown = pd.DataFrame(reach.points, columns=[lat_col, lon_col])
+            shown["Cluster"] = ("Cluster " + pd.Series(labels).astype(str)).mask(labels == -1, "Noise")
+            shown = shown.sample(min(MAP_POINTS, len(shown)), random_state=42)
+            if lat_col == "Latitude":
+                fig = px.scatter_mapbox(shown, lat=lat_col, lon=lon_col, color="Cluster", zoom=9,
+                                        center={"lat": 41.8781, "lon": -87.6298}, mapbox_style="open-street-map")
+            else:
+                fig = px.scatter(shown, x=lon_col, y=lat_col, color="Cluster")
+            fig.update_traces(marker=dict(size=4, opacity=0.7))
+            fig.update_layout(height=600, margin=dict(l=0, r=0, t=30, b=0), showlegend=bool(labels.max() < 30))
+            st.plotly_chart(fig, use_container_width=True)
+
         if MAP_PATH.exists():
             st.subheader("🌆 Interactive DBSCAN Cluster Map")
             with open(MAP_PATH, "r", encoding="utf-8") as f:
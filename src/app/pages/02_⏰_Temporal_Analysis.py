@@ -11,13 +11,14 @@ import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
 import json
+import sys
 
 # ======================================================
 # PATHS
 # ======================================================
 BASE_DIR = Path(__file__).resolve().parents[3]
-DATA_PATH_01 = BASE_DIR / "data" / "processed" / "sample_250000_rows_01.csv"
-DATA_PATH_02 = BASE_DIR / "data" / "processed" / "sample_250000_rows_02.csv"
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from data_access import SEASON_BY_MONTH, SEASONS, load_cube
 TEMP_METRICS = BASE_DIR / "reports" / "summaries" / "temporal_clustering_metrics.json"
 TEMP_SUMMARY = BASE_DIR / "reports" / "summaries" / "temporal_cluster_summary.csv"
 
@@ -394,35 +395,6 @@ st.markdown('<p class="hero-subtitle">🕐 Discover Hourly, Daily, Monthly & Sea
 # ======================================================
 # LOAD DATA
 # ======================================================
-@st.cache_data
-def load_data():
-    df_01 = pd.read_csv(DATA_PATH_01, low_memory=False)
-    df_02 = pd.read_csv(DATA_PATH_02, low_memory=False)
-    df = pd.concat([df_01, df_02], ignore_index=True)
-    df["Date"] = pd.to_datetime(df.get("Date"), errors="coerce")
-    df = df.dropna(subset=["Date"])
-
-    if "Year" not in df.columns:
-        df["Year"] = df["Date"].dt.year
-    if "Month" not in df.columns:
-        df["Month"] = df["Date"].dt.month
-    if "Day" not in df.columns:
-        df["Day"] = df["Date"].dt.day
-    if "Hour" not in df.columns:
-        df["Hour"] = df["Date"].dt.hour
-    if "Weekday" not in df.columns:
-        df["Weekday"] = df["Date"].dt.weekday
-
-    df["Season"] = df["Month"].map({
-        12: "Winter", 1: "Winter", 2: "Winter",
-        3: "Spring", 4: "Spring", 5: "Spring",
-        6: "Summer", 7: "Summer", 8: "Summer",
-        9: "Fall", 10: "Fall", 11: "Fall"
-    })
-
-    return df
-
-
 @st.cache_data
 def load_metrics():
     if TEMP_METRICS.exists():
@@ -438,7 +410,7 @@ def load_summary():
     return None
 
 
-df = load_data()
+cube = load_cube()
 metrics = load_metrics()
 summary = load_summary()
 
@@ -511,11 +483,11 @@ with tab1:
 with tab2:
     st.header("📅 Hourly Patterns")
 
-    years = sorted(df["Year"].unique())
+    year_totals = cube.query(["Year"])
+    years = year_totals[year_totals > 0].index.tolist()
     selected_years = st.multiselect("Select Years", years, default=years[-3:])
-    filtered_df = df[df["Year"].isin(selected_years)]
 
-    hourly = filtered_df["Hour"].value_counts().sort_index()
+    hourly = cube.query(["Hour"], where={"Year": selected_years})
     fig = px.line(
         x=hourly.index, 
         y=hourly.values, 
@@ -542,7 +514,7 @@ with tab3:
     st.header("📆 Daily & Weekly Trends")
 
     weekday_map = {0: "Mon", 1: "Tue", 2: "Wed", 3: "Thu", 4: "Fri", 5: "Sat", 6: "Sun"}
-    weekday_counts = df["Weekday"].map(weekday_map).value_counts()
+    weekday_counts = cube.query(["Weekday"]).rename(index=weekday_map)
     weekday_counts = weekday_counts.reindex(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"])
 
     fig = px.bar(
@@ -564,14 +536,16 @@ with tab3:
 with tab4:
     st.header("📊 Monthly & Seasonal Trends")
 
-    monthly = df.groupby(["Year", "Month"]).size().reset_index(name="Count")
+    monthly = cube.query(["Year", "Month"]).reset_index(name="Count")
+    monthly = monthly[monthly["Count"] > 0]
     monthly["Date"] = pd.to_datetime(monthly[["Year", "Month"]].assign(DAY=1))
     fig = px.line(monthly, x="Date", y="Count", markers=True, title="Monthly Crime Trend")
     fig.update_traces(line_color='#6C5B7B', marker=dict(size=8, color='#C06C84'))
     fig.update_layout(font=dict(family="Outfit, sans-serif"))
     st.plotly_chart(fig, use_container_width=True)
 
-    season_counts = df["Season"].value_counts().reindex(["Winter", "Spring", "Summer", "Fall"])
+    month_counts = cube.query(["Month"])
+    season_counts = month_counts.groupby(month_counts.index.map(SEASON_BY_MONTH)).sum().reindex(SEASONS)
     fig = px.bar(
         x=season_counts.index,
         y=season_counts.values,
@@ -588,8 +562,7 @@ with tab5:
 
     weekday_map_full = {0: "Monday", 1: "Tuesday", 2: "Wednesday", 3: "Thursday",
                         4: "Friday", 5: "Saturday", 6: "Sunday"}
-    heat_data = df.groupby(["Weekday", "Hour"]).size().reset_index(name="Count")
-    pivot = heat_data.pivot(index="Weekday", columns="Hour", values="Count").fillna(0)
+    pivot = cube.query(["Weekday", "Hour"]).unstack(fill_value=0)
     pivot.index = pivot.index.map(weekday_map_full)
 
     fig = px.imshow(
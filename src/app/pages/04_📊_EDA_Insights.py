@@ -11,13 +11,14 @@ import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
 import streamlit.components.v1 as components
+import sys
 
 # ======================================================
 # PATH SETUP
 # ======================================================
 BASE_DIR = Path(__file__).resolve().parents[3]
-DATA_PATH_01 = BASE_DIR / "data" / "processed" / "sample_250000_rows_01.csv"
-DATA_PATH_02 = BASE_DIR / "data" / "processed" / "sample_250000_rows_02.csv"
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from data_access import data_available, load_data, load_missing_counts
 FIG_DIR = BASE_DIR / "reports" / "figures"
 SUM_DIR = BASE_DIR / "reports" / "summaries"
 
@@ -459,16 +460,7 @@ def load_summary_csv(filename):
         return pd.read_csv(path)
     return None
 
-@st.cache_data
-def load_data():
-    if DATA_PATH_01.exists() and DATA_PATH_02.exists():
-        df_01 = pd.read_csv(DATA_PATH_01, low_memory=False)
-        df_02 = pd.read_csv(DATA_PATH_02, low_memory=False)
-        df = pd.concat([df_01, df_02], ignore_index=True)
-        df['Date'] = pd.to_datetime(df.get('Date'), errors='coerce')
-        df = df.dropna(subset=['Date'])
-        return df
-    return None
+DATA_COLUMNS = ['Date', 'Latitude', 'Longitude', 'Primary Type', 'District', 'Community Area']
 
 def display_image(image_path):
     if image_path.exists():
@@ -494,7 +486,7 @@ def display_html(html_path):
         st.warning(f"⚠️ HTML file not found: {html_path.name}")
 
 # Load data
-df = load_data()
+df = load_data(DATA_COLUMNS) if data_available() else None
 
 if df is not None:
     st.success(f"✅ Loaded {len(df):,} crime records for comprehensive analysis")
@@ -905,7 +897,7 @@ with tab5:
             st.markdown("---")
             st.subheader("🔍 Data Quality Analysis")
             
-            missing_data = df.isnull().sum()
+            missing_data = load_missing_counts()
             missing_pct = (missing_data / len(df) * 100).round(2)
             
             missing_df = pd.DataFrame({
@@ -10,13 +10,17 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
+from datetime import timedelta
+import sys
 
 # ======================================================
 # PATHS
 # ======================================================
 BASE_DIR = Path(__file__).resolve().parents[3]
-DATA_PATH_01 = BASE_DIR / "data" / "processed" / "sample_250000_rows_01.csv"
-DATA_PATH_02 = BASE_DIR / "data" / "processed" / "sample_250000_rows_02.csv"
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from data_access import crime_types, load_cube, load_pyramid, select_rows
+sys.path.append(str(BASE_DIR / "src" / "analysis"))
+from spatial_bins import bin_points
 CENTERS_PATH = BASE_DIR / "reports" / "summaries" / "kmeans_geo_centers_k9.csv"
 
 # ======================================================
@@ -461,14 +465,14 @@ st.markdown('<p class="hero-subtitle">📍 Interactive Crime Density & Hotspot V
 # ======================================================
 # DATA LOADERS
 # ======================================================
-@st.cache_data
-def load_data():
-    """Load and combine crime data from both files"""
-    df_01 = pd.read_csv(DATA_PATH_01, low_memory=False)
-    df_02 = pd.read_csv(DATA_PATH_02, low_memory=False)
-    df = pd.concat([df_01, df_02], ignore_index=True)
-    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    df = df.dropna(subset=['Latitude', 'Longitude', 'Date'])
+DATA_COLUMNS = ['Date', 'Hour', 'Latitude', 'Longitude', 'Primary Type',
+                'Location Description', 'Community Area', 'Arrest']
+
+def load_geo_data(start=None, end=None, primary_type=None):
+    """Rows of the shared dataset for a period / crime type, with coordinates only"""
+    df = select_rows(DATA_COLUMNS, start, end, primary_type)
+    if df[['Latitude', 'Longitude']].isna().any().any():
+        df = df.dropna(subset=['Latitude', 'Longitude'])
     return df
 
 @st.cache_data
@@ -482,7 +486,9 @@ def load_cluster_centers():
 # LOAD DATA
 # ======================================================
 with st.spinner("🔄 Loading crime data..."):
-    df = load_data()
+    df = load_geo_data()
+    cube = load_cube()
+    pyramid = load_pyramid()
     centers = load_cluster_centers()
 
 st.success(f"✅ Successfully loaded **{len(df):,}** crime records")
@@ -506,41 +512,99 @@ date_range = st.sidebar.date_input(
 
 # Crime type filter
 st.sidebar.subheader("🚨 Crime Type")
-crime_types = ['All'] + sorted(df['Primary Type'].unique().tolist())
-selected_crime = st.sidebar.selectbox("Filter by Type", crime_types)
+type_options = ['All'] + crime_types()
+selected_crime = st.sidebar.selectbox("Filter by Type", type_options)
 
-# Sample size slider
+# Map rendering
 st.sidebar.subheader("⚡ Performance")
-sample_size = st.sidebar.slider(
-    "Sample Size",
-    min_value=1000,
-    max_value=100000,
-    value=50000,
-    step=1000,
-    help="Adjust for better performance"
+map_mode = st.sidebar.radio(
+    "Map Rendering",
+    ["Aggregated grid", "Raw sample"],
+    help="Aggregated grid bins every filtered crime on the server and sends only non-empty cells"
 )
+use_grid = map_mode == "Aggregated grid"
+
+if use_grid:
+    map_zoom = st.sidebar.slider(
+        "Map Zoom",
+        min_value=min(pyramid.zooms),
+        max_value=max(pyramid.zooms),
+        value=11,
+        help="Grid cells are 8×8 screen pixels at this zoom level"
+    )
+else:
+    map_zoom = 10
+    sample_size = st.sidebar.slider(
+        "Sample Size",
+        min_value=1000,
+        max_value=100000,
+        value=50000,
+        step=1000,
+        help="Adjust for better performance"
+    )
 
 st.sidebar.markdown("---")
-st.sidebar.info("💡 **Tip:** Lower sample size = faster rendering")
+if use_grid:
+    st.sidebar.info("💡 **Tip:** The grid includes every filtered crime; higher zoom = finer cells")
+else:
+    st.sidebar.info("💡 **Tip:** Lower sample size = faster rendering")
 
 # ======================================================
 # APPLY FILTERS
 # ======================================================
-filtered_df = df.copy()
-
-# Date filter
-if len(date_range) == 2:
-    filtered_df = filtered_df[
-        (filtered_df['Date'].dt.date >= date_range[0]) &
-        (filtered_df['Date'].dt.date <= date_range[1])
-    ]
+# Date range -> binary-search slice of the date-sorted frame; crime type ->
+# precomputed row positions of that type inside the slice
+filtered_df = load_geo_data(
+    *(date_range if len(date_range) == 2 else (None, None)),
+    None if selected_crime == 'All' else selected_crime
+)
 
-# Crime type filter
-if selected_crime != 'All':
-    filtered_df = filtered_df[filtered_df['Primary Type'] == selected_crime]
+period_start, period_end = date_range if len(date_range) == 2 else (min_date, max_date)
+all_dates = period_start <= min_date and period_end >= max_date
+whole_years = (period_start.month, period_start.day, period_end.month, period_end.day) == (1, 1, 12, 31)
+
+# Map payload: grid cells over all filtered rows, or a raw sample. Periods of
+# whole calendar years (or all data) read the precomputed tile pyramid; other
+# periods bin the filtered rows on the fly.
+if use_grid and (all_dates or whole_years):
+    pyramid_filter = {
+        'primary_type': None if selected_crime == 'All' else selected_crime,
+        'years': None if all_dates else list(range(period_start.year, period_end.year + 1))
+    }
+    viz_df = pyramid.query(map_zoom, **pyramid_filter)
+    type_cells = pyramid.query(map_zoom, by_type=True, **pyramid_filter)
+elif use_grid:
+    viz_df = bin_points(filtered_df['Latitude'], filtered_df['Longitude'], map_zoom)
+    type_codes, type_names = pd.factorize(filtered_df['Primary Type'])
+    type_cells = bin_points(filtered_df['Latitude'], filtered_df['Longitude'], map_zoom, groups=type_codes)
+    type_cells['Primary Type'] = np.asarray(type_names)[type_cells['group']]
+else:
+    viz_df = filtered_df.sample(n=min(sample_size, len(filtered_df)), random_state=42)
 
-# Sample for visualization
-viz_df = filtered_df.sample(n=min(sample_size, len(filtered_df)), random_state=42)
+# ======================================================
+# FILTER AGGREGATES
+# ======================================================
+# Statistics come from the pre-aggregated cube when the period is made of whole
+# calendar months (or spans all data); other periods fall back to the rows.
+cube_where = {} if selected_crime == 'All' else {'Primary Type': selected_crime}
+if all_dates:
+    use_cube, cube_months = True, None
+else:
+    use_cube = period_start.day == 1 and (period_end + timedelta(days=1)).day == 1
+    cube_months = (period_start, period_end)
+
+if use_cube:
+    total_crimes = cube.query(where=cube_where, months=cube_months)
+    type_counts = cube.query(['Primary Type'], where=cube_where, months=cube_months)
+    area_totals = cube.area_query(where=cube_where, months=cube_months)
+    total_arrests = cube.query(measure='arrests', where=cube_where, months=cube_months)
+    hourly_counts = cube.query(['Hour'], where=cube_where, months=cube_months)
+else:
+    total_crimes = len(filtered_df)
+    type_counts = filtered_df['Primary Type'].value_counts()
+    area_totals = filtered_df['Community Area'].value_counts()
+    total_arrests = filtered_df['Arrest'].sum()
+    hourly_counts = filtered_df['Hour'].value_counts().sort_index()
 
 # ======================================================
 # FILTER SUMMARY
@@ -551,7 +615,7 @@ with col1:
     st.metric("📊 Total Filtered", f"{len(filtered_df):,}", delta=None)
 
 with col2:
-    st.metric("👁️ Displaying", f"{len(viz_df):,}", delta=None)
+    st.metric("👁️ Displaying", f"{len(viz_df):,}" + (" cells" if use_grid else ""), delta=None)
 
 with col3:
     reduction = ((len(filtered_df) - len(viz_df)) / len(filtered_df) * 100) if len(filtered_df) > 0 else 0
@@ -576,18 +640,22 @@ with tab1:
     st.header("🔥 Crime Density Heatmap")
     st.markdown("Visualize crime concentration across Chicago neighborhoods")
     
-    # Density heatmap
+    # Density heatmap (grid cells are weighted by their crime count)
+    if use_grid:
+        density_args = dict(z='count', hover_data=['count'])
+    else:
+        density_args = dict(hover_data=['Primary Type', 'Date'])
     fig = px.density_mapbox(
         viz_df,
         lat='Latitude',
         lon='Longitude',
         radius=12,
-        zoom=10,
+        zoom=map_zoom,
         center={"lat": 41.8781, "lon": -87.6298},
         mapbox_style="open-street-map",
         title="High-Resolution Crime Density Map",
-        hover_data=['Primary Type', 'Date'],
-        color_continuous_scale='Inferno'
+        color_continuous_scale='Inferno',
+        **density_args
     )
     
     fig.update_layout(
@@ -607,18 +675,24 @@ with tab2:
     st.header("📍 Crime Location Scatter Plot")
     st.markdown("Individual crime incidents colored by type")
     
-    # Color by crime type
+    # Color by crime type (grid: one marker per cell and type, sized by count)
+    if use_grid:
+        scatter_df = type_cells
+        scatter_args = dict(size='count', size_max=18, hover_data=['Primary Type', 'count'])
+    else:
+        scatter_df = viz_df
+        scatter_args = dict(hover_data=['Primary Type', 'Date', 'Location Description'])
     fig = px.scatter_mapbox(
-        viz_df,
+        scatter_df,
         lat='Latitude',
         lon='Longitude',
         color='Primary Type',
-        zoom=10,
+        zoom=map_zoom,
         center={"lat": 41.8781, "lon": -87.6298},
         mapbox_style="open-street-map",
         title="Crime Locations by Type",
-        hover_data=['Primary Type', 'Date', 'Location Description'],
-        color_discrete_sequence=px.colors.qualitative.Bold
+        color_discrete_sequence=px.colors.qualitative.Bold,
+        **scatter_args
     )
     
     fig.update_layout(
@@ -631,7 +705,7 @@ with tab2:
     
     # Top crime types
     st.subheader("📈 Top Crime Types in Selection")
-    top_crimes = viz_df['Primary Type'].value_counts().head(10)
+    top_crimes = type_counts[type_counts > 0].sort_values(ascending=False, kind='stable').head(10)
     
     fig_bar = px.bar(
         x=top_crimes.values,
@@ -688,7 +762,7 @@ with tab3:
             mapbox=dict(
                 style="open-street-map",
                 center={"lat": 41.8781, "lon": -87.6298},
-                zoom=10
+                zoom=map_zoom
             ),
             height=750,
             margin={"r":0,"t":50,"l":0,"b":0},
@@ -718,25 +792,25 @@ with tab4:
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("🚨 Total Crimes", f"{len(filtered_df):,}")
+        st.metric("🚨 Total Crimes", f"{total_crimes:,}")
     
     with col2:
-        if len(filtered_df) > 0:
-            most_common = filtered_df['Primary Type'].mode()[0]
+        if total_crimes > 0:
+            most_common = type_counts.idxmax()
             st.metric("🎯 Top Crime Type", most_common)
         else:
             st.metric("🎯 Top Crime Type", "N/A")
     
     with col3:
-        if 'Community Area' in filtered_df.columns and len(filtered_df) > 0:
-            top_area = filtered_df['Community Area'].mode()[0]
+        if area_totals.sum() > 0:
+            top_area = area_totals.idxmax()
             st.metric("📍 Top Area", f"#{int(top_area)}")
         else:
             st.metric("📍 Top Area", "N/A")
     
     with col4:
-        if 'Arrest' in filtered_df.columns and len(filtered_df) > 0:
-            arrest_rate = (filtered_df['Arrest'].sum() / len(filtered_df)) * 100
+        if total_crimes > 0:
+            arrest_rate = (total_arrests / total_crimes) * 100
             st.metric("⚖️ Arrest Rate", f"{arrest_rate:.1f}%")
         else:
             st.metric("⚖️ Arrest Rate", "N/A")
@@ -770,8 +844,8 @@ with tab4:
     
     with col2:
         st.subheader("🏘️ Crime by Community Area")
-        if 'Community Area' in filtered_df.columns:
-            area_counts = filtered_df['Community Area'].value_counts().head(10)
+        if len(area_totals) > 0:
+            area_counts = area_totals[area_totals > 0].sort_values(ascending=False, kind='stable').head(10)
             
             fig_area = px.bar(
                 y=[f"Area {int(x)}" for x in area_counts.index],
@@ -794,10 +868,7 @@ with tab4:
     st.markdown("---")
     st.subheader("⏰ Temporal Distribution")
     
-    # Crime by hour
-    hourly_data = filtered_df.copy()
-    hourly_data['Hour'] = hourly_data['Date'].dt.hour
-    hourly_counts = hourly_data['Hour'].value_counts().sort_index()
+    # Crime by hour (hourly_counts computed with the filter aggregates)
     
     fig_hourly = px.line(
         x=hourly_counts.index,
@@ -1,6 +1,11 @@
 # src/data_preprocessing/clean_data.py
+import argparse
+import json
+import uuid
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pathlib import Path
 
 # ======================================================
@@ -11,54 +16,365 @@ from pathlib import Path
 # --- Define Base Paths ---
 BASE_DIR = Path(__file__).resolve().parents[2]  # goes two levels up to project root
 RAW_PATH = BASE_DIR / "data" / "raw" / "Crimes_-_2001_to_Present_20251025.csv"
-OUTPUT_PATH = BASE_DIR / "data" / "processed" / "sample_500000_rows.csv"
+OUTPUT_PATH = BASE_DIR / "data" / "processed" / "sample_500000_rows.parquet"
 
-# --- Load Dataset ---
-print(f"📂 Loading dataset from: {RAW_PATH}")
-df = pd.read_csv(RAW_PATH)
+SAMPLE_SIZE = 500000
+MIN_YEAR = 2010
+CHUNK_SIZE = 250000
+DATE_FORMAT = "%m/%d/%Y %I:%M:%S %p"  # data portal export format
 
-# --- Clean Missing and Duplicate Records ---
-df = df.dropna().drop_duplicates(keep="last")
+# Fixed schema for the numeric/boolean columns of the raw export so that every
+# chunk parses to the same dtypes as a single full read (IUCR / FBI Code are
+# kept as text, otherwise codes like "0486" vs "041A" parse differently per chunk).
+# Integer and boolean columns are read as nullable types so a blank cell does not
+# fail the read; drop_incomplete() removes such rows and then downcasts them.
+RAW_DTYPES = {
+    "ID": "Int64", "Case Number": "str", "Block": "str", "IUCR": "str",
+    "Primary Type": "str", "Description": "str", "Location Description": "str",
+    "Arrest": "boolean", "Domestic": "boolean", "Beat": "Int64", "District": "float64",
+    "Ward": "float64", "Community Area": "float64", "FBI Code": "str",
+    "X Coordinate": "float64", "Y Coordinate": "float64", "Year": "Int64",
+    "Updated On": "str", "Latitude": "float64", "Longitude": "float64",
+    "Location": "str",
+}
+COMPLETE_DTYPES = {"ID": "int64", "Arrest": "bool", "Domestic": "bool", "Beat": "int64", "Year": "int64"}
 
 
+# Column types of the processed Parquet store
+CATEGORY_COLUMNS = ["Primary Type", "Description", "Location Description",
+                    "Block", "IUCR", "FBI Code"]
+INT8_COLUMNS = ["Month", "Day", "Weekday", "Hour", "Minute"]
+INT16_COLUMNS = ["Year"]
+ROW_GROUP_ROWS = 65536  # ingest_delta rewrites the store one row group at a time
+STORE_METADATA_KEY = b"patroliq"  # Parquet key-value metadata: clip bounds, sampling state, versions
 
-# --- Handle Numeric Outliers (IQR Clipping) ---
-num_cols = df.select_dtypes(include=[np.number]).columns
-for col in num_cols:
-    Q1 = df[col].quantile(0.25)
-    Q3 = df[col].quantile(0.75)
-    IQR = Q3 - Q1
-    lower = Q1 - 1.5 * IQR
-    upper = Q3 + 1.5 * IQR
-    df[col] = np.clip(df[col], lower, upper)
 
-df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-df = df.dropna(subset=["Date"])
-df = df[df["Date"].dt.year >= 2010]
-df["Year"] = df["Date"].dt.year
-df["Month"] = df["Date"].dt.month
-df["Day"] = df["Date"].dt.day
-df["Weekday"] = df["Date"].dt.weekday
-df["Hour"] = df["Date"].dt.hour
-df["Minute"] = df["Date"].dt.minute
-time_groups = df.groupby(["Year", "Month", "Day", "Hour"], group_keys=False)
-core_sample = time_groups.apply(lambda x: x.sample(n=1, random_state=42))
-print("Core sample size:", len(core_sample))
-remaining_needed = 500000 - len(core_sample)
-if remaining_needed > 0:
-    remaining_df = df.drop(core_sample.index)
-    extra_sample = remaining_df.sample(n=remaining_needed, random_state=42)
-    final_sample = pd.concat([core_sample, extra_sample])
-else:
-    final_sample = core_sample
+# ======================================================
+# CLEANING STEPS
+# ======================================================
+def drop_incomplete(df):
+    """Drop rows with missing values and downcast the nullable raw columns."""
+    df = df.dropna()
+    return df.astype({c: t for c, t in COMPLETE_DTYPES.items() if c in df.columns})
+
+
+def iqr_bounds(df):
+    """Return {column: (lower, upper)} IQR clipping bounds for numeric columns."""
+    bounds = {}
+    for col in df.select_dtypes(include=[np.number]).columns:
+        Q1 = df[col].quantile(0.25)
+        Q3 = df[col].quantile(0.75)
+        IQR = Q3 - Q1
+        bounds[col] = (Q1 - 1.5 * IQR, Q3 + 1.5 * IQR)
+    return bounds
+
+
+def clip_outliers(df, bounds):
+    """Clip numeric columns to precomputed IQR bounds."""
+    for col, (lower, upper) in bounds.items():
+        df[col] = np.clip(df[col], lower, upper)
+    return df
+
+
+def add_temporal_features(df):
+    """Parse Date, keep records from MIN_YEAR onwards and derive time columns."""
+    # explicit format: per-chunk inference can fail and fall back to dateutil
+    df["Date"] = pd.to_datetime(df["Date"], format=DATE_FORMAT, errors="coerce")
+    df = df.dropna(subset=["Date"])
+    df = df[df["Date"].dt.year >= MIN_YEAR].copy()
+    df["Year"] = df["Date"].dt.year
+    df["Month"] = df["Date"].dt.month
+    df["Day"] = df["Date"].dt.day
+    df["Weekday"] = df["Date"].dt.weekday
+    df["Hour"] = df["Date"].dt.hour
+    df["Minute"] = df["Date"].dt.minute
+    return df
+
+
+def clean_frame(df, bounds=None):
+    """Single-shot cleaning of a fully loaded raw export.
+
+    A dict passed as ``bounds`` receives the IQR clipping bounds used.
+    """
+    # --- Clean Missing and Duplicate Records ---
+    df = drop_incomplete(df).drop_duplicates(keep="last")
+
+    # --- Handle Numeric Outliers (IQR Clipping) ---
+    computed = iqr_bounds(df)
+    if bounds is not None:
+        bounds.update(computed)
+    df = clip_outliers(df, computed)
+
+    return add_temporal_features(df)
+
+
+# ======================================================
+# STREAMING CLEANING
+# ======================================================
+def _quantile_from_counts(counts, q):
+    """Exact linear-interpolated quantile from a value -> count Series.
+
+    Mirrors numpy's ``method="linear"`` (what ``Series.quantile`` uses) so the
+    result is identical to calling ``quantile`` on the expanded column.
+    """
+    counts = counts.sort_index()
+    n = int(counts.sum())
+    virtual = n * q + (1 - q) - 1
+    lo = int(np.floor(virtual))
+    hi = min(lo + 1, n - 1)
+    gamma = virtual - lo
+    cum = counts.cumsum().to_numpy()
+    values = counts.index.to_numpy(dtype=np.float64)
+    a = values[np.searchsorted(cum, lo, side="right")]
+    b = values[np.searchsorted(cum, hi, side="right")]
+    diff = b - a
+    if gamma >= 0.5:
+        return b - diff * (1 - gamma)
+    return a + diff * gamma
+
+
+def _in_runs(runs, h):
+    """Mask of the hashes in ``h`` present in any of the sorted ``runs``."""
+    found = np.zeros(len(h), dtype=bool)
+    for run in runs:
+        pos = np.minimum(np.searchsorted(run, h), len(run) - 1)
+        found |= run[pos] == h
+    return found
+
+
+def _scan_raw(raw_path, chunksize):
+    """First pass: row hashes for duplicate detection + numeric value counts.
+
+    Only the first occurrence of a duplicated row is counted; duplicates are
+    identical, so the counts equal those of the ``keep="last"`` survivors.
+    Hashes already seen are kept as sorted runs of decreasing size (a new
+    run is merged into the previous one while it is at least as large), so
+    a chunk is checked with one binary search per run, O(log rows) runs,
+    and every hash is re-sorted O(log rows) times overall.
+
+    Memory: 8 bytes per complete row for the row hashes (the keep mask of
+    pass 2 is built from them with a single ``duplicated`` at the end), up
+    to 8 more per distinct row for the runs, and the value counts, which
+    grow with the number of distinct numeric values.
+    """
+    hashes, runs = [], []
+    value_counts = {}
+    reader = pd.read_csv(raw_path, dtype=RAW_DTYPES, chunksize=chunksize)
+    for i, chunk in enumerate(reader):
+        chunk = drop_incomplete(chunk)
+        h = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        hashes.append(h)
+
+        first = ~pd.Series(h).duplicated().to_numpy() & ~_in_runs(runs, h)
+        if first.any():
+            runs.append(np.sort(h[first]))
+            while len(runs) > 1 and len(runs[-2]) <= len(runs[-1]):
+                runs[-2:] = [np.sort(np.concatenate(runs[-2:]))]
+        for col in chunk.select_dtypes(include=[np.number]).columns:
+            vc = chunk.loc[first, col].value_counts()
+            value_counts[col] = vc if col not in value_counts else value_counts[col].add(vc, fill_value=0)
+        print(f"   pass 1 | chunk {i + 1}: {len(chunk):,} complete rows")
+
+    hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+    keep = ~pd.Series(hashes).duplicated(keep="last").to_numpy()
+    return keep, value_counts
+
+
+def iter_clean_chunks(raw_path=RAW_PATH, chunksize=CHUNK_SIZE, bounds=None):
+    """Stream the raw export and yield cleaned chunks in file order.
+
+    Two passes over the CSV with at most one chunk in memory at a time: the
+    first finds duplicate rows and the global IQR bounds, the second applies
+    dropna / dedupe / clipping / date filtering per chunk. Concatenating the
+    chunks gives the same frame as ``clean_frame(read_csv(raw_path))``.
+    A dict passed as ``bounds`` receives the clipping bounds.
+    """
+    print(f"📂 Streaming dataset from: {raw_path} (chunksize={chunksize:,})")
+    keep, value_counts = _scan_raw(raw_path, chunksize)
+
+    bounds = {} if bounds is None else bounds
+    for col, counts in value_counts.items():
+        Q1 = _quantile_from_counts(counts, 0.25)
+        Q3 = _quantile_from_counts(counts, 0.75)
+        IQR = Q3 - Q1
+        bounds[col] = (Q1 - 1.5 * IQR, Q3 + 1.5 * IQR)
+
+    offset = 0
+    reader = pd.read_csv(raw_path, dtype=RAW_DTYPES, chunksize=chunksize)
+    for chunk in reader:
+        chunk = drop_incomplete(chunk)
+        chunk_keep = keep[offset:offset + len(chunk)]
+        offset += len(chunk)
+        chunk = clip_outliers(chunk[chunk_keep].copy(), bounds)
+        chunk = add_temporal_features(chunk)
+        if len(chunk):
+            yield chunk
+
+
+def load_clean(raw_path=RAW_PATH, chunksize=None, bounds=None):
+    """Load the cleaned dataset, streaming the raw export when chunksize is set."""
+    if chunksize:
+        return pd.concat(iter_clean_chunks(raw_path, chunksize, bounds))
+    print(f"📂 Loading dataset from: {raw_path}")
+    return clean_frame(pd.read_csv(raw_path, dtype=RAW_DTYPES), bounds)
+
+
+# ======================================================
+# PARQUET STORE
+# ======================================================
+def to_store_schema(df):
+    """Cast a cleaned frame to the compact column types of the Parquet store."""
+    df = df.copy()
+    df["Date"] = pd.to_datetime(df["Date"])
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in INT8_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("int8")
+    for col in INT16_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("int16")
+    return df.reset_index(drop=True)
+
+
+def store_table(df, metadata=None):
+    """Arrow table of a cleaned frame in the store schema, with the store metadata attached."""
+    table = pa.Table.from_pandas(to_store_schema(df), preserve_index=False)
+    if metadata is not None:
+        table = table.replace_schema_metadata(
+            {**table.schema.metadata, STORE_METADATA_KEY: json.dumps(metadata).encode()})
+    return table
+
+
+def write_store(df, path=OUTPUT_PATH, metadata=None):
+    """Write the processed dataset as typed Parquet (categoricals become dictionaries).
+
+    ``metadata`` (clip bounds, sampling state) goes into the file's key-value
+    metadata, where ingest_delta reads it from the footer, together with a
+    fresh store id and version 0 (ingest_delta bumps the version and records
+    it per changed (Year, Month) partition for eda_pipeline).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # a new store: new id, and no partition changed since it was built
+    metadata = {**(metadata or {}), "store_id": uuid.uuid4().hex, "version": 0, "partition_versions": {}}
+    pq.write_table(store_table(df, metadata), path, row_group_size=ROW_GROUP_ROWS)
+    return path
+
+
+def partition_key(year, month):
+    """Key of a (Year, Month) partition in the store metadata, e.g. "2024-05"."""
+    return f"{int(year)}-{int(month):02d}"
+
+
+def parse_partition_key(key):
+    """(Year, Month) of a partition_key."""
+    year, month = key.split("-")
+    return int(year), int(month)
+
+
+def read_store_metadata(path=OUTPUT_PATH):
+    """Store metadata written by write_store ({} for stores written without it)."""
+    metadata = pq.read_schema(path).metadata or {}
+    return json.loads(metadata.get(STORE_METADATA_KEY, b"{}"))
+
+
+# ======================================================
+# SAMPLING
+# ======================================================
+STRATA = ["Year", "Month", "Day", "Hour"]
+
+
+class StratifiedReservoirSampler:
+    """Single-pass sampler: one record per stratum plus a uniform random fill.
+
+    Every row draws two uniform keys from one seeded generator. The core keeps,
+    per stratum, the row with the smallest core key (a size-1 reservoir); the
+    fill keeps the ``n`` rows with the smallest fill key overall (a bottom-n
+    sketch). At most ``len(core)`` of those are core rows, so the non-core rows
+    among them are a uniform sample of everything outside the core.
+
+    State is bounded by ``n`` + number of strata rows, and the keys are drawn
+    row by row, so the result does not depend on how the input is chunked.
+    """
+
+    def __init__(self, n=SAMPLE_SIZE, strata=STRATA, random_state=42):
+        self.n = n
+        self.strata = list(strata)
+        self._rng = np.random.default_rng(random_state)
+        self._core = None
+        self._fill = None
+
+    def update(self, chunk):
+        keys = self._rng.random((len(chunk), 2))
+        chunk = chunk.assign(_core_key=keys[:, 0], _fill_key=keys[:, 1])
+
+        core = chunk if self._core is None else pd.concat([self._core, chunk])
+        self._core = (core.sort_values("_core_key", kind="stable")
+                          .drop_duplicates(self.strata, keep="first"))
+
+        fill = chunk if self._fill is None else pd.concat([self._fill, chunk])
+        self._fill = fill.nsmallest(self.n, "_fill_key")
+        return self
+
+    def result(self):
+        core_sample = self._core.sort_values(self.strata)
+        print("Core sample size:", len(core_sample))
+        remaining_needed = self.n - len(core_sample)
+        if remaining_needed > 0:
+            extra_sample = (self._fill[~self._fill.index.isin(core_sample.index)]
+                            .sort_values("_fill_key")
+                            .head(remaining_needed))
+            final_sample = pd.concat([core_sample, extra_sample])
+        else:
+            final_sample = core_sample
+
+        print("Final sample size:", len(final_sample))
+        return final_sample.drop(columns=["_core_key", "_fill_key"])
+
+
+def sample_dataset(df, n=SAMPLE_SIZE):
+    """One record per (Year, Month, Day, Hour) plus a random fill up to n rows."""
+    return StratifiedReservoirSampler(n).update(df).result()
+
+
+def sampling_metadata(sample, history_rows, bounds):
+    """Store metadata of a sample drawn by StratifiedReservoirSampler.
 
-print("Final sample size:", len(final_sample))
+    ``sample_rate`` is the fill rate: the share of the history outside the
+    one-row-per-stratum core that made it into the sample.
+    """
+    core_rows = len(sample[STRATA].drop_duplicates())
+    outside = history_rows - core_rows
+    return {
+        "clip_bounds": {col: [float(lo), float(hi)] for col, (lo, hi) in bounds.items()},
+        "history_rows": int(history_rows),
+        "sample_rate": (len(sample) - core_rows) / outside if outside > 0 else 1.0,
+    }
 
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean and sample the raw Chicago crimes export.")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help=f"stream the raw export in chunks of this many rows (e.g. {CHUNK_SIZE})")
+    args = parser.parse_args()
 
-# --- Save Processed Dataset ---
-OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-final_sample.to_csv(OUTPUT_PATH, index=False)
+    bounds = {}
+    if args.chunksize:
+        # cleaned chunks go straight into the sampler; the full frame never exists
+        sampler = StratifiedReservoirSampler()
+        history_rows = 0
+        for chunk in iter_clean_chunks(RAW_PATH, args.chunksize, bounds):
+            sampler.update(chunk)
+            history_rows += len(chunk)
+        final_sample = sampler.result()
+    else:
+        cleaned = load_clean(RAW_PATH, bounds=bounds)
+        history_rows = len(cleaned)
+        final_sample = sample_dataset(cleaned)
 
+    # --- Save Processed Dataset ---
+    write_store(final_sample, OUTPUT_PATH, sampling_metadata(final_sample, history_rows, bounds))
 
-print(f"✅ Cleaned and sampled dataset saved to: {OUTPUT_PATH}")
\ No newline at end of file
+    print(f"✅ Cleaned and sampled dataset saved to: {OUTPUT_PATH}")
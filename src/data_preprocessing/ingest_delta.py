@@ -0,0 +1,319 @@
+# src/data_preprocessing/ingest_delta.py
+"""
+PatrolIQ - Incremental Delta Ingest
+---------------------------------------
+Applies a delta export (new or updated incident IDs, same columns as the raw
+export) to every derived artifact instead of rerunning the whole chain:
+
+  1. processed store     - clipped with the bounds clean_data saved in the
+                           store's metadata; updated IDs are patched in their
+                           row groups, new IDs go through sample maintenance
+                           (the store is a stratified sample, see ``admit``)
+                           and the admitted rows are appended as row groups
+  2. model-ready data    - delta rows go through the saved FeaturePipeline:
+                           label encoders are extended with unseen classes
+                           (never refit), GeoCluster comes from predict, and
+                           LatBin/LonBin reuse the fitted quantile edges
+  3. summaries           - reports/summaries counts are updated with +1 for
+                           the new version of a row and -1 for the old one;
+                           TemporalCluster assignments come from predict
+  4. cube / pyramid      - the same signed rows, added to the touched cells
+                           only (rebuilt if the delta brings a year or crime
+                           type outside their axes)
+
+Summaries, cube and pyramid describe the store, so they follow the rows that
+entered or changed in it. The store metadata records a new version for every
+(Year, Month) partition touched, which eda_pipeline reads to regroup only
+those partitions. Fitting and aggregation touch the delta rows only,
+and the store is read through its ID and stratum columns. Neither Parquet
+nor CSV files can be modified in place, so the store and the model-ready CSV
+are still copied once per run: untouched row groups and lines are passed
+through as read, without being parsed into pandas.
+
+Usage:
+  python src/data_preprocessing/ingest_delta.py path/to/delta.csv
+"""
+
+import argparse
+import json
+import os
+import sys
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from pathlib import Path
+
+from clean_data import (OUTPUT_PATH as STORE_PATH, RAW_DTYPES, ROW_GROUP_ROWS, STORE_METADATA_KEY, STRATA,
+                        add_temporal_features, clip_outliers, drop_incomplete, iqr_bounds, partition_key,
+                        read_store_metadata, store_table, to_store_schema)
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.append(str(BASE_DIR / "src" / "analysis"))
+from crime_cube import CUBE_PATH, INPUT_COLUMNS as CUBE_COLUMNS, CrimeCube
+from feature_engineering import MODEL_DIR, OUTPUT_PATH as MODEL_READY_PATH, FeaturePipeline, season_labels
+from tile_pyramid import INPUT_COLUMNS as PYRAMID_COLUMNS, PYRAMID_PATH, TilePyramid
+
+SUM_DIR = BASE_DIR / "reports" / "summaries"
+TEMPORAL_DIR = MODEL_DIR / "temporal"
+TEMPORAL_COLUMNS = ["Year", "Month", "Weekday", "Hour", "IsWeekend", "SeasonLabel", "TimeLabel"]  # as temporal_clustering.py
+NUMERIC_COLUMNS = [c for c, t in RAW_DTYPES.items() if t in ("Int64", "float64") and c != "ID"]
+
+
+# ======================================================
+# STORE
+# ======================================================
+def clip_bounds(metadata):
+    """Clipping bounds of the clean_data run that built the store.
+
+    Stores written without them fall back to IQR bounds of the store's own
+    (already clipped) numeric columns; the caller saves those for next time.
+    """
+    if "clip_bounds" in metadata:
+        return {c: tuple(b) for c, b in metadata["clip_bounds"].items() if c in NUMERIC_COLUMNS}
+    print("⚠️ Store has no clip bounds (rebuild it with clean_data.py): using IQR bounds of the store")
+    return iqr_bounds(pd.read_parquet(STORE_PATH, columns=NUMERIC_COLUMNS))
+
+
+def clean_delta(delta, bounds):
+    """Clean the delta like clean_frame, with the store's clipping bounds.
+
+    ID is never clipped: it is the key the delta is matched on.
+    """
+    delta = drop_incomplete(delta).drop_duplicates("ID", keep="last")
+    delta = clip_outliers(delta, bounds)
+    return add_temporal_features(delta)
+
+
+def _stratum_keys(df):
+    """One integer per (Year, Month, Day, Hour) stratum."""
+    year, month, day, hour = (df[c].to_numpy(dtype=np.int64) for c in STRATA)
+    return ((year * 13 + month) * 32 + day) * 24 + hour
+
+
+def admit(new, index, rate):
+    """Sample maintenance: the rows of ``new`` (IDs not in the store) that enter it.
+
+    The store is clean_data's stratified sample: one row per (Year, Month,
+    Day, Hour) stratum plus a uniform fill at ``rate`` of the history. A new
+    row opening a stratum the store lacks enters as that stratum's row; any
+    other row enters with probability ``rate``. The draw is a hash of the ID,
+    so re-running a delta admits the same rows.
+    """
+    u = pd.util.hash_array(new["ID"].to_numpy()) / 2.0**64
+    keys = _stratum_keys(new)
+    candidates = np.flatnonzero(~np.isin(keys, _stratum_keys(index)))
+    candidates = candidates[np.lexsort((u[candidates], keys[candidates]))]
+    _, first = np.unique(keys[candidates], return_index=True)
+    core = np.zeros(len(new), dtype=bool)
+    core[candidates[first]] = True
+    return new[core | (u < rate)]
+
+
+def rewrite_store(positions, rows, admitted, metadata):
+    """Write the delta into the store, one row group at a time.
+
+    Row groups holding updated IDs are patched with ``rows`` (one per entry
+    of ``positions``), the others are copied as read, and ``admitted`` is
+    appended as new row groups. Returns the replaced rows (old versions) in
+    the order of ``positions``.
+    """
+    source = pq.ParquetFile(STORE_PATH)
+    schema = source.schema_arrow
+    schema = schema.with_metadata({**schema.metadata, STORE_METADATA_KEY: json.dumps(metadata).encode()})
+    tmp_path = STORE_PATH.with_name(STORE_PATH.name + ".tmp")
+    removed, start = [], 0
+    with pq.ParquetWriter(tmp_path, schema) as writer:
+        for i in range(source.num_row_groups):
+            table = source.read_row_group(i)
+            end = start + table.num_rows
+            inside = np.flatnonzero((positions >= start) & (positions < end))
+            if len(inside):
+                group = table.to_pandas()
+                local = positions[inside] - start
+                removed.append(group.iloc[local].set_axis(inside))
+                group = group.astype({c: object for c in group.select_dtypes("category").columns})
+                for j, col in enumerate(group.columns):
+                    group.iloc[local, j] = rows[col].iloc[inside].astype(group[col].dtype).to_numpy()
+                table = store_table(group)
+            writer.write_table(table.cast(schema))
+            start = end
+        if len(admitted):
+            writer.write_table(store_table(admitted[schema.names]).cast(schema), row_group_size=ROW_GROUP_ROWS)
+    os.replace(tmp_path, STORE_PATH)
+    if not removed:
+        return schema.empty_table().to_pandas()
+    return pd.concat(removed).sort_index()
+
+
+# ======================================================
+# MODEL-READY FEATURES
+# ======================================================
+def update_model_ready(features, positions):
+    """Replace the rows at ``positions`` with the first rows of ``features`` and append the rest.
+
+    The CSV is streamed line by line and only the replaced lines are
+    formatted; appending alone is a plain file append.
+    """
+    n_updated = len(positions)
+    if n_updated:
+        lines = features.iloc[:n_updated].to_csv(header=False, index=False).splitlines(keepends=True)
+        patch = dict(zip((positions + 1).tolist(), lines))  # line 0 is the header
+        tmp_path = MODEL_READY_PATH.with_name(MODEL_READY_PATH.name + ".tmp")
+        with open(MODEL_READY_PATH, newline="") as src, open(tmp_path, "w", newline="") as dst:
+            for i, line in enumerate(src):
+                dst.write(patch.get(i, line))
+        os.replace(tmp_path, MODEL_READY_PATH)
+    if len(features) > n_updated:
+        features.iloc[n_updated:].to_csv(MODEL_READY_PATH, mode="a", header=False, index=False)
+
+
+# ======================================================
+# SUMMARIES (signed deltas)
+# ======================================================
+def _signed(added, removed):
+    """Changed rows as one frame: +1 for added rows, -1 for removed rows."""
+    return pd.concat([added.assign(_sign=1), removed.assign(_sign=-1)], ignore_index=True)
+
+
+def _add_counts(path, delta, sort):
+    """Add a count delta to a one-column summary written from value_counts."""
+    if not path.exists():
+        return
+    current = pd.read_csv(path, index_col=0)
+    column = current.columns[0]
+    counts = current[column].add(delta, fill_value=0).astype(int)
+    counts = counts[counts > 0]
+    counts = counts.sort_index() if sort == "index" else counts.sort_values(ascending=False, kind="stable")
+    counts.rename(column).to_csv(path)
+
+
+def update_summaries(changes):
+    """Apply signed row changes to the EDA summaries in reports/summaries."""
+    changes = changes.assign(Season=season_labels(changes["Month"]),
+                             Arrest=changes["Arrest"].astype(int), Domestic=changes["Domestic"].astype(int))
+    weighted = changes[["Arrest", "Domestic"]].mul(changes["_sign"], axis=0)
+    changes = changes.assign(_arrests=weighted["Arrest"], _domestic=weighted["Domestic"])
+    count = lambda col: changes.groupby(col, observed=True)["_sign"].sum()
+
+    _add_counts(SUM_DIR / "crime_counts.csv", count("Primary Type"), "count")
+    _add_counts(SUM_DIR / "hourly_counts.csv", count("Hour"), "index")
+    _add_counts(SUM_DIR / "season_counts.csv", count("Season"), "count")
+
+    _add_counts(SUM_DIR / "top_community_areas.csv", count("Community Area"), "count")
+
+    path = SUM_DIR / "hour_week_counts.csv"
+    if path.exists():
+        hour_week = pd.read_csv(path, index_col="Weekday")
+        delta = count(["Weekday", "Hour"]).unstack(fill_value=0).rename(columns=str)
+        delta = delta.reindex(columns=hour_week.columns, fill_value=0)
+        hour_week.add(delta, fill_value=0).astype(int).to_csv(path)
+
+    path = SUM_DIR / "monthly_trend.csv"
+    if path.exists():
+        monthly = pd.read_csv(path, index_col=0).set_index(["Year", "Month"])["count"]
+        monthly = monthly.add(count(["Year", "Month"]), fill_value=0).astype(int)
+        monthly[monthly > 0].sort_index().rename("count").reset_index().to_csv(path)
+
+    path = SUM_DIR / "arrest_domestic_by_type.csv"
+    if path.exists():
+        arrest_dom = pd.read_csv(path, index_col="Primary Type")[["total", "arrests", "domestic"]]
+        delta = changes.groupby("Primary Type", observed=True).agg(
+            total=("_sign", "sum"), arrests=("_arrests", "sum"), domestic=("_domestic", "sum"))
+        arrest_dom = arrest_dom.add(delta, fill_value=0).astype(int)
+        arrest_dom = arrest_dom[arrest_dom["total"] > 0].reset_index()
+        arrest_dom["arrest_rate"] = arrest_dom["arrests"] / arrest_dom["total"]
+        arrest_dom["domestic_rate"] = arrest_dom["domestic"] / arrest_dom["total"]
+        arrest_dom.sort_values("total", ascending=False, kind="stable").to_csv(path, index=False)
+
+
+def update_temporal_summary(features, signs):
+    """Assign TemporalCluster by predict and update the per-cluster means and counts.
+
+    Means are stored rounded to 2 decimals, so updated means carry that rounding.
+    """
+    path = SUM_DIR / "temporal_cluster_summary.csv"
+    if not path.exists() or not (TEMPORAL_DIR / "kmeans_temporal.pkl").exists():
+        return
+    scaler = joblib.load(TEMPORAL_DIR / "temporal_scaler.pkl")
+    kmeans = joblib.load(TEMPORAL_DIR / "kmeans_temporal.pkl")
+    cluster = kmeans.predict(scaler.transform(features[TEMPORAL_COLUMNS]))
+
+    summary = pd.read_csv(path, index_col="TemporalCluster")
+    means = ["Year", "Month", "Weekday", "Hour"]
+    sums = summary[means].mul(summary["Count"], axis=0)
+    delta = features[means].mul(signs, axis=0).assign(Count=signs).groupby(cluster).sum()
+    sums = sums.add(delta[means], fill_value=0)
+    counts = summary["Count"].add(delta["Count"], fill_value=0).astype(int)
+    summary = sums.div(counts.where(counts > 0), axis=0).round(2)
+    summary["Count"] = counts
+    summary.rename_axis("TemporalCluster").to_csv(path)
+
+
+# ======================================================
+# CUBE / PYRAMID
+# ======================================================
+def update_aggregates(added, removed):
+    for path, cls, columns in [(CUBE_PATH, CrimeCube, CUBE_COLUMNS), (PYRAMID_PATH, TilePyramid, PYRAMID_COLUMNS)]:
+        if not path.exists():
+            continue
+        try:
+            aggregate = cls.load(path).update(added, removed)
+        except KeyError as e:
+            print(f"⚠️ {path.name}: {e}; rebuilding from the store")
+            aggregate = cls.build(pd.read_parquet(STORE_PATH, columns=columns))
+        aggregate.save(path)
+        print(f"✅ Updated {path.name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply a delta export of new/updated incidents.")
+    parser.add_argument("delta", type=Path, help="CSV with the raw export's columns")
+    args = parser.parse_args()
+
+    metadata = read_store_metadata(STORE_PATH)
+    bounds = clip_bounds(metadata)
+    delta = clean_delta(pd.read_csv(args.delta, dtype=RAW_DTYPES), bounds)
+
+    print("📂 Reading store index:", STORE_PATH)
+    index = pd.read_parquet(STORE_PATH, columns=["ID"] + STRATA)
+    ids = pd.Index(index["ID"])
+    if not ids.is_unique:
+        raise ValueError("store IDs are not unique; rebuild it with clean_data.py")
+    pos = ids.get_indexer(delta["ID"])
+    updated = pos >= 0
+    positions, new = pos[updated], delta[~updated]
+    if "sample_rate" not in metadata:
+        print("⚠️ Store has no sampling state (rebuild it with clean_data.py): admitting every new row")
+    admitted = admit(new, index, metadata.get("sample_rate", 1.0))
+    print(f"✅ Delta: {len(delta):,} rows ({len(positions):,} updated, {len(new):,} new,"
+          f" {len(admitted):,} of them sampled into the store)")
+
+    metadata["clip_bounds"] = {c: [float(lo), float(hi)] for c, (lo, hi) in bounds.items()}
+    # IDs outside the store are counted as new history (an unsampled row re-sent counts again)
+    metadata["history_rows"] = metadata.get("history_rows", len(index)) + len(new)
+    # (Year, Month) partitions whose rows change, for eda_pipeline: old versions and new ones
+    touched = pd.concat([index.iloc[positions], delta[updated], admitted])[["Year", "Month"]].drop_duplicates()
+    metadata["version"] = metadata.get("version", 0) + 1
+    versions = metadata.setdefault("partition_versions", {})
+    for year, month in touched.itertuples(index=False):
+        versions[partition_key(year, month)] = metadata["version"]
+    removed = rewrite_store(positions, delta[updated], admitted, metadata)
+
+    # the store's row order is the model-ready row order: updated rows in place, admitted ones appended
+    added = to_store_schema(pd.concat([delta[updated], admitted])[removed.columns])
+    pipeline = FeaturePipeline.load()
+    if pipeline.extend(added):
+        pipeline.save()
+    features = pipeline.transform(added)
+    update_model_ready(features, positions)
+    print(f"✅ Updated model-ready data: {MODEL_READY_PATH}")
+
+    update_summaries(_signed(added, removed))
+    old_features = pipeline.transform(removed)
+    signs = np.concatenate([np.ones(len(features)), -np.ones(len(old_features))])
+    update_temporal_summary(pd.concat([features, old_features], ignore_index=True), signs)
+    print(f"✅ Updated summaries in {SUM_DIR}")
+
+    update_aggregates(added, removed)
+    print("✅ Delta ingest completed")
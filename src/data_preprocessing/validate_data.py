@@ -16,13 +16,12 @@ from io import StringIO
 
 # --- Define Base Paths ---
 BASE_DIR = Path(__file__).resolve().parents[2]
-DATA_PATH_01 = BASE_DIR / "data" / "processed" / "sample_250000_rows_01.csv"
-DATA_PATH_02 = BASE_DIR / "data" / "processed" / "sample_250000_rows_02.csv"
+DATA_PATH = BASE_DIR / "data" / "processed" / "sample_500000_rows.parquet"
 REPORT_DIR = BASE_DIR / "reports"
 REPORT_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def validate_data(DATA_PATH_01, DATA_PATH_02) -> None:
+def validate_data(DATA_PATH) -> None:
     """Run full data quality assessment and save reports."""
     buffer = StringIO()
     def log(msg):  # helper to print + store text
@@ -34,14 +33,10 @@ def validate_data(DATA_PATH_01, DATA_PATH_02) -> None:
 
     summary = {}  # JSON summary output
 
-    # 1️⃣ Load data
+    # 1️⃣ Load data (every column is validated, so no projection here)
     try:
-        print("Loading data:", DATA_PATH_01)
-        df_01 = pd.read_csv(DATA_PATH_01, low_memory=False)
-        print("Loading data:", DATA_PATH_01)
-        df_02 = pd.read_csv(DATA_PATH_02, low_memory=False)
-
-        df = pd.concat([df_01, df_02], ignore_index=True)
+        print("Loading data:", DATA_PATH)
+        df = pd.read_parquet(DATA_PATH)
         print("Total_rows:", len(df))
 
         log(f"✅ Loaded dataset: {len(df):,} records, {len(df.columns)} columns")
@@ -138,4 +133,4 @@ def validate_data(DATA_PATH_01, DATA_PATH_02) -> None:
 
 
 if __name__ == "__main__":
-    validate_data(DATA_PATH_01, DATA_PATH_02)
\ No newline at end of file
+    validate_data(DATA_PATH)
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+PatrolIQ - Centroid Scoring
+---------------------------------------
+Assigns cluster labels to batches of incidents with the saved centers:
+
+  GeoCluster       - geo_cluster.pkl (12 centers, feature engineering)
+  GeoClusterK9     - clustering/kmeans_geo_k9.pkl
+  TemporalCluster  - temporal/kmeans_temporal.pkl after temporal_scaler.pkl
+
+Centers come from models/inference.npz (model_export.py), or straight from
+the pickles when no export exists. Labels are computed by the chunked
+nearest-center kernel of model_export, so memory stays bounded for any
+batch size. Incidents need Latitude/Longitude (models trained on
+LatBin/LonBin get them binned with the saved edges) and either the
+model-ready temporal columns or a Date to derive them from. Binning and
+deriving need the saved edges and SeasonLabel/TimeLabel encoders, which the
+export only holds when the feature pipeline was saved; without them a batch
+that lacks the model columns gets no label column for that model, like a
+model whose centers are missing.
+
+Running the module measures throughput (rows/sec) for batch sizes from 1
+to 1M rows resampled from the Parquet store.
+"""
+
+import argparse
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from model_export import CHUNK_ROWS, EXPORT_PATH, TEMPORAL_COLUMNS, ModelExport, nearest_center
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+sys.path.append(str(BASE_DIR / "src" / "analysis"))
+from feature_engineering import DATA_PATH, season_labels, time_of_day
+
+REPORTS_DIR = BASE_DIR / "reports" / "summaries"
+BENCHMARK_PATH = REPORTS_DIR / "scoring_benchmark.json"
+
+GEO_MODELS = {"GeoCluster": "geo_cluster", "GeoClusterK9": "geo_k9"}
+BIN_SOURCES = {"LatBin": "Latitude", "LonBin": "Longitude"}
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+MIN_SECONDS = 0.5  # each batch size is repeated for at least this long
+
+
+class CentroidScorer:
+    def __init__(self, export=None, chunk_rows=CHUNK_ROWS):
+        if export is None:
+            export = ModelExport.load() if EXPORT_PATH.exists() else ModelExport.build()
+        self.export = export
+        self.chunk_rows = chunk_rows
+        # centers are tiny: keep them as in-memory arrays for the kernel
+        self.centers = {name: np.array(export.centers(name)) for name in ["geo_cluster", "geo_k9", "temporal"]
+                        if f"{name}/centers" in export.arrays}
+        # label codes of every month / hour, so deriving temporal columns is two array lookups
+        self.season_code = self.time_code = None
+        if "encoder/SeasonLabel" in export.arrays:
+            months, hours = np.arange(1, 13), np.arange(24)
+            self.season_code = np.concatenate([[-1], export.encode("SeasonLabel", season_labels(pd.Series(months)))])
+            self.time_code = export.encode("TimeLabel", np.asarray(time_of_day(hours)))
+
+    def _missing_bins(self, name, df):
+        """Bin edges a geo model needs for ``df`` that the export lacks."""
+        return [f"bins/{BIN_SOURCES[c]}" for c in self.export.arrays[f"{name}/columns"]
+                if c in BIN_SOURCES and c not in df.columns and f"bins/{BIN_SOURCES[c]}" not in self.export.arrays]
+
+    def geo_features(self, name, df):
+        """Input matrix of a geo model; LatBin/LonBin are binned from the
+        coordinates with the saved edges when ``df`` lacks them."""
+        missing = self._missing_bins(name, df)
+        if missing:
+            raise ValueError(f"binning coordinates for {name} needs the {', '.join(missing)} array(s); "
+                             "re-export with the feature pipeline saved")
+        columns = list(self.export.arrays[f"{name}/columns"])
+        X = np.empty((len(df), len(columns)))
+        for j, column in enumerate(columns):
+            if column in df.columns or column not in BIN_SOURCES:
+                X[:, j] = df[column].to_numpy(dtype=np.float64)
+                continue
+            # same bins as pd.cut(values, edges, include_lowest=True) after clipping to the edges
+            edges = self.export.arrays[f"bins/{BIN_SOURCES[column]}"]
+            values = np.clip(df[BIN_SOURCES[column]].to_numpy(dtype=np.float64), edges[0], edges[-1])
+            codes = np.maximum(np.searchsorted(edges, values, side="left") - 1, 0)
+            X[:, j] = np.where(np.isnan(values), np.nan, codes)
+        return X
+
+    def temporal_features(self, df):
+        """Model-ready temporal columns (TEMPORAL_COLUMNS order), derived from Date when missing."""
+        if all(c in df.columns for c in TEMPORAL_COLUMNS):
+            return df[TEMPORAL_COLUMNS]
+        if self.season_code is None:
+            raise ValueError("deriving temporal columns from Date needs the encoder/SeasonLabel and "
+                             "encoder/TimeLabel arrays; re-export with the feature pipeline saved")
+        date = pd.to_datetime(df["Date"]).dt
+        month, weekday, hour = date.month.to_numpy(), date.weekday.to_numpy(), date.hour.to_numpy()
+        return np.column_stack([date.year.to_numpy(), month, weekday, hour, weekday >= 5,
+                                self.season_code[month], self.time_code[hour]]).astype(np.float64)
+
+    def score(self, df):
+        """GeoCluster / GeoClusterK9 / TemporalCluster of every incident (-1 where inputs are missing)."""
+        out = pd.DataFrame(index=df.index)
+        for column, name in GEO_MODELS.items():
+            if name in self.centers and not self._missing_bins(name, df):
+                out[column] = nearest_center(self.geo_features(name, df), self.centers[name], self.chunk_rows)
+        derivable = self.season_code is not None or all(c in df.columns for c in TEMPORAL_COLUMNS)
+        if "temporal" in self.centers and derivable:
+            X = self.export.transform("temporal_scaler", self.temporal_features(df))
+            out["TemporalCluster"] = nearest_center(X, self.centers["temporal"], self.chunk_rows)
+        return out
+
+
+def _rate(func, n):
+    """Rows/sec of ``func`` on an n-row batch, repeated for at least MIN_SECONDS."""
+    func()  # warm-up
+    calls, start = 0, time.perf_counter()
+    while True:
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS:
+            return n * calls / elapsed, elapsed / calls
+
+
+def throughput(scorer, incidents, batch_sizes=BATCH_SIZES, random_state=42):
+    """Rows/sec per batch size, end to end (DataFrame in, labels out) and for the geo kernel alone."""
+    rng = np.random.default_rng(random_state)
+    rows = incidents.iloc[rng.integers(0, len(incidents), max(batch_sizes))].reset_index(drop=True)
+    coords = scorer.geo_features("geo_cluster", rows)
+    results = {}
+    print(f"{'batch':>10} {'rows/sec':>14} {'latency':>12} {'kernel rows/sec':>17}")
+    for n in batch_sizes:
+        batch = rows.iloc[:n]
+        rate, latency = _rate(lambda: scorer.score(batch), n)
+        kernel, _ = _rate(lambda: nearest_center(coords[:n], scorer.centers["geo_cluster"], scorer.chunk_rows), n)
+        results[n] = {"rows_per_sec": round(rate), "latency_ms": round(latency * 1000, 3),
+                      "kernel_rows_per_sec": round(kernel)}
+        print(f"{n:>10,} {rate:>14,.0f} {latency * 1000:>10.3f}ms {kernel:>17,.0f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nearest-centroid scoring throughput")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS,
+                        help="rows per distance block (bounds kernel memory)")
+    args = parser.parse_args()
+
+    scorer = CentroidScorer(chunk_rows=args.chunk_rows)
+    incidents = pd.read_parquet(DATA_PATH, columns=["Date", "Latitude", "Longitude"])
+    results = throughput(scorer, incidents)
+
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(BENCHMARK_PATH, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"\n✅ Throughput saved → {BENCHMARK_PATH}")
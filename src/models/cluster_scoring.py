@@ -0,0 +1,147 @@
+"""
+PatrolIQ - Cluster Scoring
+---------------------------------------
+Silhouette scores for model selection without the O(n²) cost of scoring
+every row against every row.
+
+Modes:
+  exact   - all rows, computed in row blocks so the distance matrix held in
+            memory never exceeds ``memory_mb``.
+  sampled - exact silhouette values of a stratified (per-cluster) sample of
+            anchor rows, each measured against ALL rows. The stratified mean
+            estimates the full score without bias, with a normal confidence
+            interval from the per-cluster variances.
+
+Both return a dict that is merged into the metrics JSON, so every score
+records the mode that produced it.
+
+With ``weights`` every row of X stands for that many identical rows
+(deduplicated input); scores are those of the expanded data.
+"""
+
+import numpy as np
+from scipy.stats import norm
+from sklearn.metrics.pairwise import euclidean_distances
+
+SILHOUETTE_MODES = ("sampled", "exact")
+SAMPLE_SIZE = 10000
+MEMORY_MB = 256
+CONFIDENCE = 0.95
+
+
+def silhouette_values(X, labels, rows=None, memory_mb=MEMORY_MB, weights=None):
+    """Exact silhouette value of ``rows`` (default: every row) against all of X.
+
+    Distances are computed for a block of rows at a time; per-cluster distance
+    sums come from one matrix product with the (weighted) cluster indicator
+    matrix. A row's own duplicates are at distance 0, so only the cluster
+    sizes change with weights.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    weights = np.ones(len(X)) if weights is None else np.asarray(weights, dtype=np.float64)
+    _, codes = np.unique(labels, return_inverse=True)
+    n_clusters = codes.max() + 1
+    sizes = np.bincount(codes, weights=weights, minlength=n_clusters)
+    onehot = np.zeros((len(X), n_clusters))
+    onehot[np.arange(len(X)), codes] = weights
+
+    rows = np.arange(len(X)) if rows is None else np.asarray(rows)
+    block = max(1, int(memory_mb * 2**20 // (8 * len(X))))
+    values = np.empty(len(rows))
+    for start in range(0, len(rows), block):
+        idx = rows[start:start + block]
+        sums = euclidean_distances(X[idx], X) @ onehot
+        own = codes[idx]
+        own_size = sizes[own]
+        a = sums[np.arange(len(idx)), own] / np.maximum(own_size - 1, 1)
+        sums[np.arange(len(idx)), own] = np.inf
+        b = (sums / sizes).min(axis=1)
+        s = (b - a) / np.maximum(a, b)
+        values[start:start + block] = np.where(own_size > 1, np.nan_to_num(s), 0.0)
+    return values
+
+
+def stratified_sample(labels, sample_size, random_state=42, weights=None):
+    """Row positions drawn per cluster in proportion to its size (at least 2 each).
+
+    With ``weights``, rows of the expanded data are drawn: a row is picked
+    with probability proportional to its weight (with replacement).
+    """
+    rng = np.random.default_rng(random_state)
+    labels = np.asarray(labels)
+    if weights is None:
+        clusters, sizes = np.unique(labels, return_counts=True)
+        quota = np.minimum(sizes, np.maximum(2, np.round(sample_size * sizes / len(labels)).astype(int)))
+        return [rng.choice(np.flatnonzero(labels == c), size=q, replace=False)
+                for c, q in zip(clusters, quota)]
+    weights = np.asarray(weights, dtype=np.float64)
+    clusters = np.unique(labels)
+    sizes = np.array([weights[labels == c].sum() for c in clusters])
+    quota = np.maximum(2, np.round(sample_size * sizes / sizes.sum()).astype(int))
+    strata = []
+    for c, q in zip(clusters, quota):
+        members = np.flatnonzero(labels == c)
+        strata.append(rng.choice(members, size=q, replace=True, p=weights[members] / weights[members].sum()))
+    return strata
+
+
+def silhouette(X, labels, mode="sampled", sample_size=SAMPLE_SIZE, memory_mb=MEMORY_MB,
+               confidence=CONFIDENCE, random_state=42, weights=None):
+    """Silhouette score plus how it was produced.
+
+    ``sampled`` falls back to ``exact`` when X has no more than
+    ``sample_size`` rows.
+    """
+    if mode not in SILHOUETTE_MODES:
+        raise ValueError(f"Unknown silhouette mode: {mode} (expected one of {SILHOUETTE_MODES})")
+    labels = np.asarray(labels)
+    row_weights = np.ones(len(labels)) if weights is None else np.asarray(weights, dtype=np.float64)
+    n_rows = row_weights.sum()
+    if mode == "exact" or len(labels) <= sample_size:
+        values = silhouette_values(X, labels, memory_mb=memory_mb, weights=weights)
+        score = float(np.average(values, weights=row_weights))
+        return {"silhouette": score, "silhouette_mode": "exact", "silhouette_rows": int(n_rows)}
+
+    strata = stratified_sample(labels, sample_size, random_state, weights)
+    values = silhouette_values(X, labels, np.concatenate(strata), memory_mb=memory_mb, weights=weights)
+    shares = np.array([row_weights[labels == labels[rows[0]]].sum() for rows in strata]) / n_rows
+
+    mean, var, offset = 0.0, 0.0, 0
+    for w, rows in zip(shares, strata):
+        s = values[offset:offset + len(rows)]
+        offset += len(rows)
+        mean += w * s.mean()
+        if len(rows) < 2:
+            continue  # a singleton cluster, scored in full: no sampling variance
+        if weights is not None:
+            fpc = 1.0  # drawn with replacement: no finite-population correction
+        else:
+            fpc = max(0.0, 1 - len(rows) / (w * n_rows))  # 0 when every member was scored
+        var += w**2 * fpc * s.var(ddof=1) / len(rows)
+    half = norm.ppf(0.5 + confidence / 2) * np.sqrt(var)
+    return {
+        "silhouette": float(mean),
+        "silhouette_mode": "sampled",
+        "silhouette_rows": int(offset),
+        "silhouette_ci": [float(mean - half), float(mean + half)],
+        "silhouette_confidence": confidence,
+    }
+
+
+def davies_bouldin(X, labels, weights=None):
+    """Davies-Bouldin index, like sklearn's ``davies_bouldin_score`` but with row weights."""
+    X = np.asarray(X, dtype=np.float64)
+    weights = np.ones(len(X)) if weights is None else np.asarray(weights, dtype=np.float64)
+    _, codes = np.unique(labels, return_inverse=True)
+    n_clusters = codes.max() + 1
+    sizes = np.bincount(codes, weights=weights, minlength=n_clusters)
+    centroids = np.stack([np.bincount(codes, weights=weights * X[:, j], minlength=n_clusters)
+                          for j in range(X.shape[1])], axis=1) / sizes[:, None]
+    spread = np.linalg.norm(X - centroids[codes], axis=1)
+    intra = np.bincount(codes, weights=weights * spread, minlength=n_clusters) / sizes
+    centroid_dist = euclidean_distances(centroids)
+    if np.allclose(intra, 0) or np.allclose(centroid_dist, 0):
+        return 0.0
+    centroid_dist[centroid_dist == 0] = np.inf
+    ratio = (intra[:, None] + intra[None, :]) / centroid_dist
+    return float(np.max(ratio, axis=1).mean())
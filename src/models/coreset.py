@@ -0,0 +1,155 @@
+"""
+PatrolIQ - Weighted Coresets
+---------------------------------------
+Compact weighted summaries of large point sets for the clustering jobs, so
+KMeans runs on CORESET_SIZE weighted points instead of a random subsample
+or the full history.
+
+Lightweight coreset (Bachem, Lucic & Krause, 2018): with μ the (weighted)
+mean, point x of weight w is drawn with probability
+
+    q(x) = 1/2 · w / Σw  +  1/2 · w·d(x, μ)² / Σ w·d(x, μ)²
+
+m times (with replacement) and kept with weight w / (m·q(x)). For
+m = O((d·k·log k + log 1/δ) / ε²), with probability 1 - δ every set Q of k
+centers satisfies
+
+    |cost_coreset(Q) - cost(Q)|  <=  ε/2 · cost(Q)  +  ε/2 · cost({μ})
+
+where cost is the weighted sum of squared distances to the nearest center.
+The guarantee is for this k-means cost only. It says nothing about density
+(DBSCAN) or merge costs (Ward): a coreset point stands for hundreds of rows
+spread around it, so density-based and linkage methods keep running on rows.
+
+Streams are summarised by merge-and-reduce: every chunk is reduced to a
+coreset, and two coresets of the same level are merged and reduced again
+(a binary counter), so memory is O(m · log(rows / chunk)). Each level
+compounds the error once, so the bound above holds with ε·log(rows / chunk).
+
+The bound is checked in practice by ``approximation_error``: centers fitted
+on the coreset against an exact KMeans run on a uniform benchmark sample of
+the same stream.
+"""
+
+import time
+import numpy as np
+from sklearn.cluster import KMeans
+
+CORESET_SIZE = 20000
+BENCHMARK_ROWS = 50000  # uniform sample kept for approximation_error
+CHUNK_ROWS = 65536      # rows per distance block in kmeans_cost
+
+
+def kmeans_cost(X, centers, weights=None, chunk_rows=CHUNK_ROWS):
+    """Weighted sum of squared distances of X to their nearest center."""
+    X = np.asarray(X, dtype=np.float64)
+    centers = np.asarray(centers, dtype=np.float64)
+    weights = np.ones(len(X)) if weights is None else np.asarray(weights, dtype=np.float64)
+    c_sq = (centers ** 2).sum(axis=1)
+    cost = 0.0
+    for start in range(0, len(X), chunk_rows):
+        block = X[start:start + chunk_rows]
+        d2 = (block ** 2).sum(axis=1) + np.min(c_sq - 2 * block @ centers.T, axis=1)
+        cost += float(np.maximum(d2, 0) @ weights[start:start + chunk_rows])
+    return cost
+
+
+def lightweight_coreset(X, size=CORESET_SIZE, weights=None, rng=None):
+    """Lightweight coreset of (weighted) X: points and weights, at most ``size`` points.
+
+    Inputs of at most ``size`` points are returned as they are (exact).
+    """
+    X = np.asarray(X, dtype=np.float64)
+    weights = np.ones(len(X)) if weights is None else np.asarray(weights, dtype=np.float64)
+    if len(X) <= size:
+        return X, weights
+    rng = np.random.default_rng(rng)
+    d2 = ((X - np.average(X, axis=0, weights=weights)) ** 2).sum(axis=1)
+    spread = weights @ d2
+    q = weights / weights.sum()
+    if spread > 0:  # all points equal: uniform (by weight) is already exact
+        q = 0.5 * q + 0.5 * weights * d2 / spread
+    q /= q.sum()
+    # drawing a point twice is one point of twice the weight
+    idx, hits = np.unique(rng.choice(len(X), size=size, p=q), return_counts=True)
+    return X[idx], hits * weights[idx] / (size * q[idx])
+
+
+class StreamingCoreset:
+    """Merge-and-reduce coreset of a stream of chunks, plus a benchmark sample of its rows."""
+
+    def __init__(self, size=CORESET_SIZE, benchmark_rows=BENCHMARK_ROWS, random_state=42):
+        self.size = size
+        self.benchmark_rows = benchmark_rows
+        self.rng = np.random.default_rng(random_state)
+        self.levels = []  # level i: coreset of 2^i chunks, or None
+        self.rows = 0
+        self.benchmark = None
+        self._benchmark_keys = np.empty(0)
+
+    def add(self, X, weights=None):
+        X = np.asarray(X, dtype=np.float64)
+        self.rows += len(X) if weights is None else float(np.sum(weights))
+        self._sample(X, weights)
+        summary = lightweight_coreset(X, self.size, weights, self.rng)
+        level = 0
+        while level < len(self.levels) and self.levels[level] is not None:
+            summary = self._reduce([self.levels[level], summary])
+            self.levels[level] = None
+            level += 1
+        if level == len(self.levels):
+            self.levels.append(None)
+        self.levels[level] = summary
+        return self
+
+    def _reduce(self, parts):
+        points, weights = zip(*parts)
+        return lightweight_coreset(np.concatenate(points), self.size, np.concatenate(weights), self.rng)
+
+    def _sample(self, X, weights=None):
+        """Bottom-k sample of the stream's rows (smallest random keys).
+
+        A point of weight w stands for w rows: its key is Exp(1) / w
+        (Efraimidis-Spirakis), so heavier points are kept proportionally more
+        often; unweighted input gets a uniform sample.
+        """
+        if not self.benchmark_rows:
+            return
+        keys = self.rng.exponential(size=len(X))
+        if weights is not None:
+            keys /= np.asarray(weights, dtype=np.float64)
+        if self.benchmark is None:
+            self.benchmark = np.empty((0, X.shape[1]))
+        self.benchmark = np.concatenate([self.benchmark, X])
+        self._benchmark_keys = np.concatenate([self._benchmark_keys, keys])
+        if len(self.benchmark) > self.benchmark_rows:
+            keep = np.argpartition(self._benchmark_keys, self.benchmark_rows)[:self.benchmark_rows]
+            self.benchmark, self._benchmark_keys = self.benchmark[keep], self._benchmark_keys[keep]
+
+    def coreset(self):
+        """Points and weights summarising every row added so far."""
+        parts = [part for part in self.levels if part is not None]
+        if not parts:
+            raise ValueError("no rows were added to the coreset")
+        return self._reduce(parts)
+
+
+def approximation_error(sample, centers, sample_weight=None, random_state=42):
+    """Sample cost of ``centers`` (fitted on a coreset) against an exact KMeans
+    (n_init=10) of the same k on ``sample``.
+
+    ``relative_error`` is cost(centers) / cost(exact) - 1; it can be slightly
+    negative when the exact run stops at a worse local optimum.
+    """
+    start = time.perf_counter()
+    exact = KMeans(n_clusters=len(centers), random_state=random_state, n_init=10)
+    exact.fit(sample, sample_weight=sample_weight)
+    exact_cost = kmeans_cost(sample, exact.cluster_centers_, sample_weight)
+    coreset_cost = kmeans_cost(sample, centers, sample_weight)
+    return {
+        "benchmark_rows": len(sample),
+        "coreset_cost": coreset_cost,
+        "exact_cost": exact_cost,
+        "relative_error": coreset_cost / exact_cost - 1,
+        "exact_seconds": round(time.perf_counter() - start, 2),
+    }
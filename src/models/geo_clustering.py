@@ -3,6 +3,32 @@ PatrolIQ - Geographic Clustering
 ---------------------------------------
 Performs geographic clustering using KMeans, DBSCAN, and Hierarchical models.
 Generates metrics, cluster center coordinates, and visual maps.
+
+With --dedupe every row is clustered, collapsed first to its distinct
+coordinates (block-snapped in the source data, so heavily duplicated), or to
+grid cells of --quantize-m metres. KMeans, DBSCAN and two-stage Ward run on
+the points with their row counts as sample_weight and metrics are weighted
+the same way; the label of a row is the label of its point (inverse index),
+and the per-row labels of the three models are saved to
+data/processed/geo_cluster_labels.parquet. Bin columns (LatBin/LonBin) are
+indices, not degrees: --quantize-m then snaps the store's Latitude/Longitude.
+
+With --coreset N the full history is streamed into an N-point weighted
+coreset (coreset.py) that KMeans runs on; its centers are checked against an
+exact run on a uniform sample of the stream (relative cost error in the
+metrics). The coreset bounds the k-means cost only, so DBSCAN and Ward run
+on that row sample instead, as they do on the default row sample.
+
+With --warm-start KMeans is refitted from the persisted kmeans_geo_k9.pkl
+centers with a single init (warm_start.py); the full n_init=10 search runs
+only if the centers drift beyond --drift-threshold. Iterations, drift and
+the time saved against the last full search are recorded under
+kmeans/retrain in the metrics.
+
+Ward runs on a 10k row sample by default, as before. --hierarchical
+two-stage opts into Ward over micro-clusters of every row instead; its
+metrics and dendrogram (leaves are micro-clusters) then differ from the
+sample run.
 """
 
 import pandas as pd
@@ -11,10 +37,21 @@ import joblib
 import json
 import folium
 from folium.plugins import HeatMap
-from sklearn.cluster import KMeans, DBSCAN, AgglomerativeClustering
-from sklearn.metrics import silhouette_score, davies_bouldin_score
+from sklearn.cluster import KMeans, MiniBatchKMeans, DBSCAN, AgglomerativeClustering
 from scipy.cluster.hierarchy import linkage, dendrogram
+from scipy.optimize import linear_sum_assignment
 from pathlib import Path
+from cluster_scoring import SAMPLE_SIZE, SILHOUETTE_MODES, davies_bouldin, silhouette
+from grid_dbscan import GridDBSCAN
+from model_export import compact
+from coreset import StreamingCoreset, approximation_error
+from reachability import MAX_EPS, Reachability
+from warm_start import DRIFT_THRESHOLD, retrain_record, warm_fit
+from weighted_ward import TwoStageWard
+import argparse
+import sys
+import time
+import pyarrow.parquet as pq
 import matplotlib.pyplot as plt
 import warnings
 
@@ -28,14 +65,70 @@ DATA_PATH = BASE_DIR / "data" / "processed" / "model_ready_data.csv"
 REPORTS_DIR = BASE_DIR / "reports" / "summaries"
 FIGURES_DIR = BASE_DIR / "reports" / "figures"
 MODELS_DIR = BASE_DIR / "models" / "clustering"
+KMEANS_PATH = MODELS_DIR / "kmeans_geo_k9.pkl"
+METRICS_PATH = REPORTS_DIR / "geo_clustering_metrics.json"
+ROW_LABELS_PATH = BASE_DIR / "data" / "processed" / "geo_cluster_labels.parquet"
+
+sys.path.append(str(BASE_DIR / "src" / "data_preprocessing"))
+from clean_data import CHUNK_SIZE, OUTPUT_PATH as STORE_PATH, RAW_PATH, iter_clean_chunks
+
+STREAM_BATCH = 10000       # rows per MiniBatchKMeans step
+REFERENCE_SIZE = 100000    # same cap as the in-memory KMeans
+METERS_PER_DEGREE = 111320
+DBSCAN_EPS = 0.005
+DBSCAN_MIN_SAMPLES = 30
 
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 FIGURES_DIR.mkdir(parents=True, exist_ok=True)
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
+parser = argparse.ArgumentParser(description="Geographic clustering (KMeans, DBSCAN, Hierarchical)")
+parser.add_argument("--silhouette", choices=SILHOUETTE_MODES, default="sampled",
+                    help="sampled: stratified sample with confidence interval; exact: all rows, blocked")
+parser.add_argument("--silhouette-sample", type=int, default=SAMPLE_SIZE,
+                    help="anchor rows for the sampled silhouette")
+parser.add_argument("--dbscan", choices=["grid", "sklearn"], default="grid",
+                    help="grid: grid-indexed engine (same labels, bounded memory); sklearn: neighbourhood graph")
+parser.add_argument("--dbscan-rows", type=int, default=100000,
+                    help="coordinate rows sampled for DBSCAN (0 = all rows)")
+parser.add_argument("--optics-max-eps", type=float, default=MAX_EPS,
+                    help="save the OPTICS reachability of the DBSCAN rows for re-cutting at any eps"
+                         " up to this value (0 = skip)")
+parser.add_argument("--hierarchical", choices=["two-stage", "sample"], default="sample",
+                    help="two-stage: micro-clusters of all rows + weighted Ward; sample: Ward on a 10k sample")
+summary = parser.add_mutually_exclusive_group()
+summary.add_argument("--dedupe", action="store_true",
+                     help="cluster all rows as distinct points weighted by their row counts")
+summary.add_argument("--coreset", type=int, default=0,
+                     help="cluster a weighted coreset of this many points of the full history (0 = off)")
+parser.add_argument("--quantize-m", type=float, default=0,
+                    help="with --dedupe: snap coordinates to grid cells of this many metres (0 = exact duplicates)")
+parser.add_argument("--stream", action="store_true",
+                    help="also fit a streaming MiniBatchKMeans over every row of the cleaned history")
+parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE,
+                    help="rows per streamed chunk")
+parser.add_argument("--warm-start", action="store_true",
+                    help="refit KMeans from the persisted centers (single init) instead of a full search")
+parser.add_argument("--drift-threshold", type=float, default=DRIFT_THRESHOLD,
+                    help="with --warm-start: largest center shift (fraction of the RMS cluster radius)"
+                         " before falling back to the full search")
+args = parser.parse_args()
+
 # ======================================================
 # LOAD DATA
 # ======================================================
+def stream_coordinates(chunksize):
+    """Cleaned Latitude/Longitude of the full history, one chunk in memory at a time."""
+    if RAW_PATH.exists():
+        for chunk in iter_clean_chunks(RAW_PATH, chunksize):
+            yield chunk[["Latitude", "Longitude"]].to_numpy(dtype=np.float64)
+    else:
+        print(f"⚠️ Raw export not found, streaming the processed store instead: {STORE_PATH}")
+        for batch in pq.ParquetFile(STORE_PATH).iter_batches(batch_size=chunksize,
+                                                            columns=["Latitude", "Longitude"]):
+            yield batch.to_pandas().dropna().to_numpy(dtype=np.float64)
+
+
 print("📂 Loading data...")
 df = pd.read_csv(DATA_PATH, low_memory=False)
 
@@ -48,10 +141,52 @@ if not possible_lat or not possible_lon:
 
 lat_col = possible_lat[0]
 lon_col = possible_lon[0]
-coords = df[[lat_col, lon_col]].dropna()
-coords = coords.sample(min(100000, len(coords)), random_state=42)
-
+all_coords = df[[lat_col, lon_col]].dropna()
 print(f"✅ Found coordinate columns: {lat_col}, {lon_col}")
+
+
+def unique_points(coords, meters=0):
+    """Distinct points of ``coords``, their row counts, and the point of every row.
+
+    With ``meters`` > 0 rows are first snapped to grid cells of that size; a
+    cell is represented by the mean of its rows.
+    """
+    X = coords.to_numpy(dtype=np.float64)
+    if not meters:
+        points, inverse, counts = np.unique(X, axis=0, return_inverse=True, return_counts=True)
+        return pd.DataFrame(points, columns=coords.columns), inverse.reshape(-1), counts
+    step = meters / METERS_PER_DEGREE * np.array([1, 1 / np.cos(np.radians(X[:, 0].mean()))])
+    cells = np.floor(X / step).astype(np.int64)
+    _, inverse, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    points = np.stack([np.bincount(inverse, weights=X[:, j]) for j in range(2)], axis=1) / counts[:, None]
+    return pd.DataFrame(points, columns=coords.columns), inverse, counts
+
+
+if args.dedupe:
+    if args.quantize_m and "bin" in lat_col.lower():
+        print(f"🔹 {lat_col}/{lon_col} are bin indices, not degrees: quantising Latitude/Longitude"
+              f" of {STORE_PATH.name}")
+        lat_col, lon_col = "Latitude", "Longitude"
+        all_coords = pd.read_parquet(STORE_PATH, columns=[lat_col, lon_col]).dropna()
+    coords, inverse, weights = unique_points(all_coords, args.quantize_m)
+    print(f"✅ Collapsed {len(all_coords):,} rows to {len(coords):,} distinct points")
+elif args.coreset:
+    print(f"🔹 Streaming the full history into a {args.coreset:,}-point coreset...")
+    start = time.perf_counter()
+    builder = StreamingCoreset(args.coreset)
+    for chunk in stream_coordinates(args.chunksize):
+        builder.add(chunk)
+    points, weights = builder.coreset()
+    inverse = None
+    lat_col, lon_col = "Latitude", "Longitude"
+    coords = pd.DataFrame(points, columns=[lat_col, lon_col])
+    # row-based steps (OPTICS) use the uniform benchmark sample of the stream
+    all_coords = pd.DataFrame(builder.benchmark, columns=[lat_col, lon_col])
+    print(f"✅ Coreset of {builder.rows:,} rows: {len(coords):,} weighted points"
+          f" ({time.perf_counter() - start:.1f}s)")
+else:
+    coords, inverse, weights = all_coords.sample(min(100000, len(all_coords)), random_state=42), None, None
 print(f"✅ Data loaded: {coords.shape}")
 
 # ======================================================
@@ -60,15 +195,48 @@ print(f"✅ Data loaded: {coords.shape}")
 metrics = {"kmeans": {}, "dbscan": {}, "hierarchical": {}}
 
 # ---------- KMEANS ----------
-print("🔹 Running KMeans (k=9)...")
-kmeans = KMeans(n_clusters=9, random_state=42, n_init=10)
-labels_km = kmeans.fit_predict(coords)
-metrics["kmeans"]["silhouette"] = float(silhouette_score(coords, labels_km))
-metrics["kmeans"]["davies_bouldin"] = float(davies_bouldin_score(coords, labels_km))
+def last_full_search_seconds():
+    """Time of the last full KMeans search, from the previous metrics (None if unknown)."""
+    if not METRICS_PATH.exists():
+        return None
+    with open(METRICS_PATH) as f:
+        return json.load(f).get("kmeans", {}).get("retrain", {}).get("full_search_seconds")
+
+
+warm = None
+if args.warm_start:
+    previous = joblib.load(KMEANS_PATH) if KMEANS_PATH.exists() else None
+    names = getattr(previous, "feature_names_in_", None)
+    if previous is None or (names is not None and list(names) != list(coords.columns)):
+        print(f"⚠️ No persisted KMeans on {list(coords.columns)}: running the full search")
+    else:
+        kmeans, warm = warm_fit(coords, previous.cluster_centers_, weights)
+        print(f"✅ Warm start from {KMEANS_PATH.name}: {warm['iterations']} iteration(s),"
+              f" {warm['seconds']:.2f}s, drift {warm['drift']:.3f}")
+        if warm["drift"] > args.drift_threshold:
+            print(f"⚠️ Drift above {args.drift_threshold}: falling back to the full search")
+
+full_seconds = None
+if warm is None or warm["drift"] > args.drift_threshold:
+    print("🔹 Running KMeans (k=9)...")
+    start = time.perf_counter()
+    kmeans = KMeans(n_clusters=9, random_state=42, n_init=10).fit(coords, sample_weight=weights)
+    full_seconds = round(time.perf_counter() - start, 2)
+labels_km = kmeans.labels_
+metrics["kmeans"]["retrain"] = retrain_record(warm, args.drift_threshold, full_seconds,
+                                              last_full_search_seconds())
+metrics["kmeans"].update(silhouette(coords, labels_km, args.silhouette, args.silhouette_sample, weights=weights))
+metrics["kmeans"]["davies_bouldin"] = davies_bouldin(coords, labels_km, weights)
+if weights is not None:
+    metrics["kmeans"].update({"rows": int(round(weights.sum())), "points": len(coords)})
+if args.coreset:
+    metrics["kmeans"]["coreset"] = approximation_error(builder.benchmark, kmeans.cluster_centers_)
+    print(f"✅ Coreset KMeans vs exact run on {len(builder.benchmark):,} sampled rows:"
+          f" {metrics['kmeans']['coreset']['relative_error']:+.2%} cost")
 print(f"✅ KMeans trained | Silhouette: {metrics['kmeans']['silhouette']:.4f}")
 
 # Save model
-joblib.dump(kmeans, MODELS_DIR / "kmeans_geo_k9.pkl")
+joblib.dump(compact(kmeans), KMEANS_PATH)
 
 # Save cluster centers with standard column names
 centers = pd.DataFrame(kmeans.cluster_centers_, columns=[lat_col, lon_col])
@@ -76,25 +244,100 @@ centers = centers.rename(columns={lat_col: "Latitude", lon_col: "Longitude"})
 centers.to_csv(REPORTS_DIR / "kmeans_geo_centers_k9.csv", index=False)
 print("✅ Saved KMeans centers → Latitude, Longitude columns standardized")
 
+# ---------- STREAMING KMEANS (full history) ----------
+if args.stream:
+    print("🔹 Running streaming MiniBatchKMeans (k=9) over the full history...")
+    start = time.perf_counter()
+    rng = np.random.default_rng(42)
+    minibatch = MiniBatchKMeans(n_clusters=9, batch_size=STREAM_BATCH, random_state=42)
+    reference, reference_keys = np.empty((0, 2)), np.empty(0)
+    n_rows = 0
+    for chunk in stream_coordinates(args.chunksize):
+        chunk = chunk[rng.permutation(len(chunk))]
+        for i in range(0, len(chunk), STREAM_BATCH):
+            minibatch.partial_fit(chunk[i:i + STREAM_BATCH])
+        n_rows += len(chunk)
+
+        # uniform bottom-k sample of the stream for the in-memory KMeans reference
+        reference = np.concatenate([reference, chunk])
+        reference_keys = np.concatenate([reference_keys, rng.random(len(chunk))])
+        if len(reference) > REFERENCE_SIZE:
+            keep = np.argpartition(reference_keys, REFERENCE_SIZE)[:REFERENCE_SIZE]
+            reference, reference_keys = reference[keep], reference_keys[keep]
+    stream_seconds = time.perf_counter() - start
+
+    # Centroid drift against the existing KMeans setup (k=9, n_init=10, 100k rows),
+    # with centers paired by minimum total distance
+    kmeans_ref = KMeans(n_clusters=9, random_state=42, n_init=10).fit(reference)
+    delta = minibatch.cluster_centers_[:, None, :] - kmeans_ref.cluster_centers_[None, :, :]
+    delta[..., 1] *= np.cos(np.radians(reference[:, 0].mean()))
+    distance = np.sqrt((delta ** 2).sum(axis=2)) * METERS_PER_DEGREE
+    rows, cols = linear_sum_assignment(distance)
+    drift = distance[rows, cols]
+
+    labels_mb = minibatch.predict(reference)
+    metrics["minibatch_kmeans"] = silhouette(reference, labels_mb, args.silhouette, args.silhouette_sample)
+    metrics["minibatch_kmeans"].update({
+        "davies_bouldin": davies_bouldin(reference, labels_mb),
+        "rows": n_rows,
+        "seconds": round(stream_seconds, 2),
+        "centroid_drift_m": {"mean": float(drift.mean()), "max": float(drift.max())},
+    })
+    print(f"✅ MiniBatchKMeans trained on {n_rows:,} rows in {stream_seconds:.1f}s"
+          f" | centroid drift vs KMeans: mean {drift.mean():.0f} m, max {drift.max():.0f} m")
+
+    joblib.dump(compact(minibatch), MODELS_DIR / "minibatch_kmeans_geo_k9.pkl")
+    stream_centers = pd.DataFrame(minibatch.cluster_centers_[rows], columns=["Latitude", "Longitude"])
+    stream_centers["KMeansLatitude"] = kmeans_ref.cluster_centers_[cols, 0]
+    stream_centers["KMeansLongitude"] = kmeans_ref.cluster_centers_[cols, 1]
+    stream_centers["DriftMeters"] = drift.round(1)
+    stream_centers.to_csv(REPORTS_DIR / "minibatch_geo_centers_k9.csv", index=False)
+
 # ---------- DBSCAN ----------
-print("🔹 Running DBSCAN...")
-dbscan = DBSCAN(eps=0.005, min_samples=30, n_jobs=-1)
-labels_db = dbscan.fit_predict(coords)
+# with --dedupe, min_samples counts rows: a point's weight is its row count.
+# Coreset weights say nothing about density, so --coreset clusters rows.
+db_coords, db_weights = (coords, weights) if args.dedupe else (all_coords, None)
+if db_weights is None and args.dbscan_rows:
+    db_coords = all_coords.sample(min(args.dbscan_rows, len(all_coords)), random_state=42)
+db_rows = np.ones(len(db_coords)) if db_weights is None else db_weights
+print(f"🔹 Running DBSCAN ({args.dbscan} engine, {int(round(db_rows.sum())):,} rows)...")
+if args.dbscan == "grid":
+    dbscan = GridDBSCAN(eps=DBSCAN_EPS, min_samples=DBSCAN_MIN_SAMPLES, n_jobs=-1)
+else:
+    dbscan = DBSCAN(eps=DBSCAN_EPS, min_samples=DBSCAN_MIN_SAMPLES, n_jobs=-1)
+labels_db = dbscan.fit_predict(db_coords, sample_weight=db_weights)
+metrics["dbscan"].update({"engine": args.dbscan, "rows": int(round(db_rows.sum())),
+                          "eps": DBSCAN_EPS, "min_samples": DBSCAN_MIN_SAMPLES})
 
 valid_mask = labels_db != -1
-if valid_mask.sum() > 100:
-    metrics["dbscan"]["silhouette"] = float(silhouette_score(coords[valid_mask], labels_db[valid_mask]))
-    metrics["dbscan"]["davies_bouldin"] = float(davies_bouldin_score(coords[valid_mask], labels_db[valid_mask]))
+valid_weights = None if db_weights is None else db_weights[valid_mask]
+if db_rows[valid_mask].sum() > 100:
+    metrics["dbscan"].update(silhouette(db_coords[valid_mask], labels_db[valid_mask], args.silhouette,
+                                        args.silhouette_sample, weights=valid_weights))
+    metrics["dbscan"]["davies_bouldin"] = davies_bouldin(db_coords[valid_mask], labels_db[valid_mask], valid_weights)
 else:
     metrics["dbscan"]["silhouette"] = None
     metrics["dbscan"]["davies_bouldin"] = None
 print(f"✅ DBSCAN trained | Clusters found: {len(set(labels_db)) - 1}")
 
+# ---------- DBSCAN reachability (eps slider of the dashboard) ----------
+# OPTICS has no sample weights: it always runs on rows, the same rows
+# DBSCAN gets without --dedupe
+if args.optics_max_eps:
+    optics_coords = all_coords
+    if args.dbscan_rows:
+        optics_coords = all_coords.sample(min(args.dbscan_rows, len(all_coords)), random_state=42)
+    print(f"🔹 Computing OPTICS reachability (max eps {args.optics_max_eps}, {len(optics_coords):,} rows)...")
+    start = time.perf_counter()
+    reach_path = Reachability.build(optics_coords, DBSCAN_MIN_SAMPLES, args.optics_max_eps).save()
+    print(f"✅ Reachability saved → {reach_path} ({time.perf_counter() - start:.1f}s)")
+
 # ---------- Generate DBSCAN map ----------
 try:
     print("🗺️ Generating DBSCAN map...")
-    dbscan_coords = coords.copy()
+    dbscan_coords = db_coords.copy()
     dbscan_coords["Cluster"] = labels_db
+    dbscan_coords["Weight"] = db_rows
 
     center_lat = dbscan_coords[lat_col].mean()
     center_lon = dbscan_coords[lon_col].mean()
@@ -107,7 +350,7 @@ try:
             continue
         cluster_points = dbscan_coords[dbscan_coords["Cluster"] == c]
         HeatMap(
-            list(zip(cluster_points[lat_col], cluster_points[lon_col])),
+            list(zip(cluster_points[lat_col], cluster_points[lon_col], cluster_points["Weight"])),
             radius=6,
             blur=10,
             min_opacity=0.4
@@ -120,23 +363,48 @@ except Exception as e:
     print(f"⚠️ Map generation skipped due to: {e}")
 
 # ---------- HIERARCHICAL ----------
-print("🔹 Running Hierarchical Clustering (sample 10k for memory safety)...")
-sampled = coords.sample(min(10000, len(coords)), random_state=42)
-hier = AgglomerativeClustering(n_clusters=9, linkage="ward")
-labels_h = hier.fit_predict(sampled)
+# distinct points already cover every row: always two-stage. Coreset weights
+# carry no bound on Ward's merge costs, so --coreset clusters rows.
+hier_weights = weights if args.dedupe else None
+hier_mode = "two-stage" if args.dedupe else args.hierarchical
+if args.dedupe:
+    print(f"🔹 Running Hierarchical Clustering (weighted Ward, {len(coords):,} points)...")
+    sampled = coords
+    hier = TwoStageWard(n_clusters=9)
+elif hier_mode == "two-stage":
+    print(f"🔹 Running Hierarchical Clustering (micro-clusters + weighted Ward, {len(all_coords):,} rows)...")
+    sampled = all_coords
+    hier = TwoStageWard(n_clusters=9)
+else:
+    print("🔹 Running Hierarchical Clustering (sample 10k for memory safety)...")
+    rows = all_coords if args.coreset else coords
+    sampled = rows.sample(min(10000, len(rows)), random_state=42)
+    hier = AgglomerativeClustering(n_clusters=9, linkage="ward")
+if hier_weights is None:
+    labels_h = hier.fit_predict(sampled)
+else:
+    labels_h = hier.fit_predict(sampled, sample_weight=hier_weights)
+n_rows = len(sampled) if hier_weights is None else int(round(hier_weights.sum()))
+metrics["hierarchical"].update({"mode": hier_mode, "rows": n_rows})
 
-metrics["hierarchical"]["silhouette"] = float(silhouette_score(sampled, labels_h))
-metrics["hierarchical"]["davies_bouldin"] = float(davies_bouldin_score(sampled, labels_h))
+metrics["hierarchical"].update(silhouette(sampled, labels_h, args.silhouette, args.silhouette_sample,
+                                          weights=hier_weights))
+metrics["hierarchical"]["davies_bouldin"] = davies_bouldin(sampled, labels_h, hier_weights)
 print(f"✅ Hierarchical trained | Silhouette: {metrics['hierarchical']['silhouette']:.4f}")
 
 # ---------- Dendrogram ----------
 try:
     print("🌳 Generating dendrogram...")
-    linkage_matrix = linkage(sampled.sample(2000, random_state=42), method='ward')
+    if hier_mode == "two-stage":
+        linkage_matrix = hier.linkage_  # leaves are micro-clusters covering every row
+        xlabel = "Micro-cluster Index (or number of micro-clusters)"
+    else:
+        linkage_matrix = linkage(sampled.sample(2000, random_state=42), method='ward')
+        xlabel = "Sample Index"
     plt.figure(figsize=(10, 6))
     dendrogram(linkage_matrix, truncate_mode="level", p=5)
     plt.title("Hierarchical Clustering Dendrogram")
-    plt.xlabel("Sample Index")
+    plt.xlabel(xlabel)
     plt.ylabel("Distance")
     dendro_path = FIGURES_DIR / "dendrogram_geo.png"
     plt.savefig(dendro_path, bbox_inches="tight")
@@ -145,14 +413,27 @@ try:
 except Exception as e:
     print(f"⚠️ Dendrogram skipped due to: {e}")
 
+# ======================================================
+# PER-ROW LABELS (--dedupe)
+# ======================================================
+if args.dedupe:
+    row_labels = pd.DataFrame({
+        "Row": all_coords.index,  # row of the clustered input (model-ready CSV or store)
+        "KMeansCluster": labels_km[inverse],
+        "DBSCANCluster": labels_db[inverse],
+        "HierarchicalCluster": labels_h[inverse],
+    })
+    row_labels.to_parquet(ROW_LABELS_PATH, index=False)
+    print(f"✅ Labels of {len(row_labels):,} rows saved → {ROW_LABELS_PATH}")
+
 # ======================================================
 # SAVE METRICS
 # ======================================================
-out_path = REPORTS_DIR / "geo_clustering_metrics.json"
+out_path = METRICS_PATH
 with open(out_path, "w") as f:
     json.dump(metrics, f, indent=4)
 
 print("\n✅ Metrics saved →", out_path)
 for k, v in metrics.items():
-    print(f"📊 {k.upper()} - Silhouette: {v['silhouette']} | DB Index: {v['davies_bouldin']}")
+    print(f"📊 {k.upper()} - Silhouette: {v['silhouette']} ({v.get('silhouette_mode')}) | DB Index: {v['davies_bouldin']}")
 print("\n🏁 Geographic clustering completed successfully.")
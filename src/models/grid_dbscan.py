@@ -0,0 +1,247 @@
+"""
+PatrolIQ - Grid DBSCAN
+---------------------------------------
+DBSCAN for 2-D points with a fixed eps, using a uniform grid instead of a
+neighbourhood graph. Labels are identical to sklearn.cluster.DBSCAN
+(euclidean metric) on the same input.
+
+Points are hashed into square cells of side just under eps/√2, so any two
+points of one cell are neighbours and every neighbour of a point lies within
+two cells of it. This gives three shortcuts:
+  - a cell holding at least min_samples points (total weight, with
+    sample_weight) contains only core points;
+  - all core points of a cell belong to the same cluster;
+  - neighbours are searched in the 5x5 surrounding cells only.
+
+The work is a list of (cell, neighbour cell) items. Items are grouped into
+tiles of TILE_CELLS x TILE_CELLS cells, and each tile reads its own cells
+plus a 2-cell halo that overlaps the tiles around it. Tiles are processed in
+parallel and their results merged, in three passes:
+  1. neighbour counts of points in sparse cells -> core points
+  2. core-to-core links between cells -> connected components -> clusters
+     (cell pairs are first tried on their outermost cores; the full pair
+     check runs only for pairs not already connected through other cells)
+  3. border points -> lowest-numbered cluster among their core neighbours
+
+With ``sample_weight`` a point is core when the weights of its neighbours
+(itself included) sum to at least min_samples, as in sklearn, so distinct
+points weighted by their duplicate counts get the labels of the full rows.
+
+Memory is O(n + cells + PAIR_BUDGET); no per-point neighbour lists exist.
+"""
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+PAIR_BUDGET = 2_000_000  # point pairs evaluated per vectorized batch
+TILE_CELLS = 64          # tile side, in grid cells
+REACH = 2                # neighbour cells lie within this many cells
+OFFSETS = [(dx, dy) for dx in range(-REACH, REACH + 1) for dy in range(-REACH, REACH + 1)]
+DIRECTIONS = np.array([[1, 0], [-1, 0], [0, 1], [0, -1], [1, 1], [-1, -1], [1, -1], [-1, 1]], dtype=np.float64)
+
+
+# ======================================================
+# GRID
+# ======================================================
+def _grid(X, eps):
+    """Sort points by cell; return the order and per-cell key/start/size."""
+    side = eps / np.sqrt(2) * (1 - 1e-9)  # margin keeps in-cell distances <= eps despite rounding
+    cell = np.floor((X - X.min(axis=0)) / side).astype(np.int64) + REACH
+    ny = int(cell[:, 1].max()) + REACH + 1
+    keys = cell[:, 0] * ny + cell[:, 1]
+    order = np.argsort(keys, kind="stable")
+    cell_keys, starts, sizes = np.unique(keys[order], return_index=True, return_counts=True)
+    return order, cell_keys, starts, sizes, ny
+
+
+def _neighbour_cells(cell_keys, ny):
+    """All (cell, neighbour cell) index pairs, each cell paired with itself too."""
+    a, b = [], []
+    for dx, dy in OFFSETS:
+        target = cell_keys + dx * ny + dy
+        pos = np.minimum(np.searchsorted(cell_keys, target), len(cell_keys) - 1)
+        hit = np.flatnonzero(cell_keys[pos] == target)
+        a.append(hit)
+        b.append(pos[hit])
+    return np.concatenate(a), np.concatenate(b)
+
+
+def _ranges(mask, cell_starts, cell_sizes):
+    """Per-cell (start, size) of the points selected by ``mask`` once compacted."""
+    before = np.concatenate([[0], np.cumsum(mask)])
+    return before[cell_starts], before[cell_starts + cell_sizes] - before[cell_starts]
+
+
+# ======================================================
+# PAIR EVALUATION
+# ======================================================
+def _batches(a_start, a_len, b_start, b_len):
+    """Split items into row pieces and group them into batches of <= ~PAIR_BUDGET pairs."""
+    rows = np.maximum(1, PAIR_BUDGET // np.maximum(b_len, 1))
+    pieces = -(-a_len // rows)
+    item = np.repeat(np.arange(len(a_len)), pieces)
+    j = np.arange(len(item)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    p_start = a_start[item] + j * rows[item]
+    p_len = np.minimum(rows[item], a_start[item] + a_len[item] - p_start)
+    sizes = p_len * b_len[item]
+    batch = (np.cumsum(sizes) - sizes) // PAIR_BUDGET
+    for idx in np.split(np.arange(len(item)), np.flatnonzero(np.diff(batch)) + 1):
+        yield item[idx], p_start[idx], p_len[idx], b_start[item[idx]], b_len[item[idx]]
+
+
+def _extremes(XC, c_start, c_len):
+    """Per cell with core points, its outermost core in each of the 8 DIRECTIONS."""
+    cell_of = np.repeat(np.arange(len(c_len)), c_len)
+    reps = np.zeros((len(DIRECTIONS), len(c_len)), dtype=np.int64)
+    filled = c_len > 0
+    for r, direction in enumerate(DIRECTIONS):
+        order = np.lexsort((-(XC @ direction), cell_of))
+        reps[r, filled] = order[c_start[filled]]
+    return reps
+
+
+def _close_pairs(XA, XB, a_start, a_len, b_start, b_len, eps2):
+    """(item, i, j) for every point pair of every item with squared distance <= eps2.
+
+    The distance is evaluated as dx*dx + dy*dy, the same float operations
+    sklearn's KD-tree uses, so boundary decisions match it exactly.
+    """
+    out = []
+    for item, p_start, p_len, q_start, q_len in _batches(a_start, a_len, b_start, b_len):
+        sizes = p_len * q_len
+        piece = np.repeat(np.arange(len(sizes)), sizes)
+        k = np.arange(len(piece)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        i = p_start[piece] + k // q_len[piece]
+        j = q_start[piece] + k % q_len[piece]
+        dx = XA[i, 0] - XB[j, 0]
+        dy = XA[i, 1] - XB[j, 1]
+        close = dx * dx + dy * dy <= eps2
+        out.append((item[piece[close]], i[close], j[close]))
+    if not out:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    return tuple(np.concatenate(parts) for parts in zip(*out))
+
+
+def _count_tile(X, weights, items, eps2):
+    _, i, j = _close_pairs(X, X, *items, eps2)
+    idx, inverse = np.unique(i, return_inverse=True)
+    return idx, np.bincount(inverse, weights=weights[j], minlength=len(idx))
+
+
+def _link_tile(XC, items, eps2):
+    item, _, _ = _close_pairs(XC, XC, *items, eps2)
+    return np.unique(item)
+
+
+def _border_tile(XN, XC, core_label, items, eps2):
+    _, i, j = _close_pairs(XN, XC, *items, eps2)
+    best = np.full(len(XN), np.iinfo(np.int64).max)
+    np.minimum.at(best, i, core_label[j])
+    found = np.flatnonzero(best != np.iinfo(np.int64).max)
+    return found, best[found]
+
+
+def _components(a, b, n_cells):
+    """Connected component of every cell, given the linked cell pairs."""
+    graph = coo_matrix((np.ones(len(a)), (a, b)), shape=(n_cells, n_cells))
+    return connected_components(graph, directed=False)[1]
+
+
+def _by_tile(item_cells, cell_keys, ny):
+    """Item positions grouped by the tile of their first cell."""
+    key = cell_keys[item_cells]
+    tile = (key // ny // TILE_CELLS) * (ny // TILE_CELLS + 1) + key % ny // TILE_CELLS
+    order = np.argsort(tile, kind="stable")
+    return np.split(order, np.flatnonzero(np.diff(tile[order])) + 1)
+
+
+class GridDBSCAN:
+    """Drop-in for ``DBSCAN(eps, min_samples)`` on 2-D euclidean data."""
+
+    def __init__(self, eps=0.5, min_samples=5, n_jobs=None):
+        self.eps = eps
+        self.min_samples = min_samples
+        self.n_jobs = n_jobs
+
+    def _map_tiles(self, func, tiles, args):
+        """Run ``func(*args(tile))`` for every tile, in parallel."""
+        return Parallel(n_jobs=self.n_jobs)(delayed(func)(*args(tile)) for tile in tiles)
+
+    def fit(self, X, y=None, sample_weight=None):
+        X = np.asarray(X, dtype=np.float64)
+        n = len(X)
+        eps2 = self.eps * self.eps
+        weights = np.ones(n) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+        order, cell_keys, starts, sizes, ny = _grid(X, self.eps)
+        XS, WS = X[order], weights[order]
+        mass = np.add.reduceat(WS, starts)  # total weight of every cell
+        ca, cb = _neighbour_cells(cell_keys, ny)
+
+        # 1) core points: every point of a dense cell, otherwise count neighbours
+        core = np.repeat(mass >= self.min_samples, sizes)
+        # cells whose whole 5x5 block weighs less than min_samples have no core
+        reachable = np.bincount(ca, weights=mass[cb], minlength=len(sizes))
+        sparse = np.flatnonzero((mass[ca] < self.min_samples) & (reachable[ca] >= self.min_samples))
+        items = (starts[ca], sizes[ca], starts[cb], sizes[cb])
+        counts = np.zeros(n)
+        for idx, cnt in self._map_tiles(
+                _count_tile, _by_tile(ca[sparse], cell_keys, ny),
+                lambda t: (XS, WS, tuple(v[sparse[t]] for v in items), eps2)):
+            counts[idx] += cnt
+        core |= counts >= self.min_samples
+
+        # 2) clusters: connected components of cells linked by a core pair
+        c_start, c_len = _ranges(core, starts, sizes)
+        XC = XS[core]
+        both = np.flatnonzero((ca < cb) & (c_len[ca] > 0) & (c_len[cb] > 0))
+        # most linked cell pairs are settled by their outermost cores facing each other
+        reps = _extremes(XC, c_start, c_len)
+        ra, rb = reps[:, ca[both]][:, None, :], reps[:, cb[both]][None, :, :]
+        dx = XC[ra, 0] - XC[rb, 0]
+        dy = XC[ra, 1] - XC[rb, 1]
+        quick = both[(dx * dx + dy * dy <= eps2).any(axis=(0, 1))]
+        component = _components(ca[quick], cb[quick], len(cell_keys))
+        # only pairs not already connected through other cells need a full check
+        rest = both[component[ca[both]] != component[cb[both]]]
+        items = (c_start[ca], c_len[ca], c_start[cb], c_len[cb])
+        tiles = _by_tile(ca[rest], cell_keys, ny)
+        linked = self._map_tiles(_link_tile, tiles, lambda t: (XC, tuple(v[rest[t]] for v in items), eps2))
+        linked = np.concatenate([quick] + [rest[t[hit]] for t, hit in zip(tiles, linked)])
+        component = _components(ca[linked], cb[linked], len(cell_keys))
+        n_cells = len(cell_keys)
+
+        # sklearn numbers clusters in order of their lowest-index core point
+        labels = np.full(n, -1, dtype=np.int64)
+        core_rows = order[core]
+        core_comp = np.repeat(component, c_len)
+        first = np.full(n_cells, n, dtype=np.int64)
+        np.minimum.at(first, core_comp, core_rows)
+        used = np.flatnonzero(first < n)
+        rank = np.empty(n_cells, dtype=np.int64)
+        rank[used[np.argsort(first[used], kind="stable")]] = np.arange(len(used))
+        core_label = rank[core_comp]
+        labels[core_rows] = core_label
+
+        # 3) border points: lowest cluster label among core neighbours
+        n_start, n_len = _ranges(~core, starts, sizes)
+        XN = XS[~core]
+        edge = np.flatnonzero((n_len[ca] > 0) & (c_len[cb] > 0))
+        items = (n_start[ca], n_len[ca], c_start[cb], c_len[cb])
+        border = np.full(len(XN), np.iinfo(np.int64).max)
+        for idx, best in self._map_tiles(
+                _border_tile, _by_tile(ca[edge], cell_keys, ny),
+                lambda t: (XN, XC, core_label, tuple(v[edge[t]] for v in items), eps2)):
+            border[idx] = np.minimum(border[idx], best)
+        found = border != np.iinfo(np.int64).max
+        labels[order[~core][found]] = border[found]
+
+        self.labels_ = labels
+        self.core_sample_indices_ = np.sort(core_rows)
+        self.components_ = X[self.core_sample_indices_]
+        return self
+
+    def fit_predict(self, X, y=None, sample_weight=None):
+        return self.fit(X, sample_weight=sample_weight).labels_
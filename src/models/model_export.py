@@ -0,0 +1,193 @@
+"""
+PatrolIQ - Model Export
+---------------------------------------
+Compact inference state of the fitted models, in one memory-mappable file
+(models/inference.npz) instead of full sklearn pickles.
+
+A pickled KMeans carries the labels_ of every training row (~2 MB for 500k
+rows) although predict only needs cluster_centers_. The export keeps only:
+
+  <kmeans>/centers          cluster centers
+  <kmeans>/columns          feature names, in order
+  <scaler>/mean, /scale     StandardScaler   (X - mean) / scale
+  <scaler>/min, /scale      MinMaxScaler     X * scale + min
+  encoder/<column>          LabelEncoder classes
+  bins/<column>             LatBin / LonBin edges
+
+The file is an uncompressed .npz, so np.load reads it as usual, and
+ModelExport.load memory-maps every array in place: loading costs no copy
+and no unpickling, and does not depend on the scikit-learn version.
+
+Usage (after training):
+  python src/models/model_export.py
+"""
+
+import copy
+import struct
+import zipfile
+import joblib
+import numpy as np
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+MODELS_DIR = BASE_DIR / "models"
+EXPORT_PATH = MODELS_DIR / "inference.npz"
+
+KMEANS_MODELS = {  # export name -> pickle
+    "geo_cluster": MODELS_DIR / "geo_cluster.pkl",
+    "geo_k9": MODELS_DIR / "clustering" / "kmeans_geo_k9.pkl",
+    "temporal": MODELS_DIR / "temporal" / "kmeans_temporal.pkl",
+}
+SCALERS = {
+    "latlon_scaler": MODELS_DIR / "latlon_scaler.pkl",
+    "temporal_scaler": MODELS_DIR / "temporal" / "temporal_scaler.pkl",
+}
+TEMPORAL_COLUMNS = ["Year", "Month", "Weekday", "Hour", "IsWeekend", "SeasonLabel", "TimeLabel"]
+DEFAULT_COLUMNS = {  # for models fitted on plain arrays (no feature_names_in_)
+    "geo_cluster": ["Latitude", "Longitude"],
+    "geo_k9": ["Latitude", "Longitude"],
+    "temporal": TEMPORAL_COLUMNS,
+    "latlon_scaler": ["Latitude", "Longitude"],
+    "temporal_scaler": TEMPORAL_COLUMNS,
+}
+
+
+CHUNK_ROWS = 65536  # rows per distance block in nearest_center
+
+
+def nearest_center(X, centers, chunk_rows=CHUNK_ROWS):
+    """Index of the nearest center of every row (-1 for rows with NaN).
+
+    Squared distances are ||c||² - 2 x·c (||x||² does not change the argmin),
+    computed for ``chunk_rows`` rows at a time, so memory stays at
+    chunk_rows x n_centers floats whatever the batch size.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    centers = np.asarray(centers, dtype=np.float64)
+    c_sq = (centers ** 2).sum(axis=1)
+    labels = np.empty(len(X), dtype=np.int32)
+    for start in range(0, len(X), chunk_rows):
+        block = X[start:start + chunk_rows]
+        labels[start:start + len(block)] = np.argmin(c_sq - 2 * block @ centers.T, axis=1)
+    labels[np.isnan(X).any(axis=1)] = -1
+    return labels
+
+
+def compact(model):
+    """Copy of a fitted clustering model without its per-row training labels."""
+    model = copy.copy(model)
+    if hasattr(model, "labels_"):
+        del model.labels_
+    return model
+
+
+def _mmap_npz(path):
+    """Memory-map every array of an uncompressed .npz (np.load cannot for archives)."""
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} is compressed and cannot be memory-mapped")
+            f.seek(info.header_offset)
+            name_len, extra_len = struct.unpack("<HH", f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            shape, fortran, dtype = read_header(f)
+            arrays[info.filename[:-len(".npy")]] = np.memmap(
+                path, dtype=dtype, mode="r", offset=f.tell(), shape=shape, order="F" if fortran else "C")
+    return arrays
+
+
+class ModelExport:
+    def __init__(self, arrays):
+        self.arrays = arrays  # "group/name" -> array
+
+    # ---------------- build / persist ----------------
+    @classmethod
+    def build(cls, kmeans_models=KMEANS_MODELS, scalers=SCALERS, pipeline_path=None):
+        arrays = {}
+
+        def columns(name, model):
+            names = getattr(model, "feature_names_in_", None)
+            return np.asarray(names if names is not None else DEFAULT_COLUMNS[name], dtype=str)
+
+        for name, path in kmeans_models.items():
+            if Path(path).exists():
+                model = joblib.load(path)
+                arrays[f"{name}/centers"] = np.asarray(model.cluster_centers_, dtype=np.float64)
+                arrays[f"{name}/columns"] = columns(name, model)
+        for name, path in scalers.items():
+            if Path(path).exists():
+                scaler = joblib.load(path)
+                arrays[f"{name}/columns"] = columns(name, scaler)
+                arrays[f"{name}/scale"] = scaler.scale_
+                if hasattr(scaler, "min_"):
+                    arrays[f"{name}/min"] = scaler.min_
+                else:
+                    arrays[f"{name}/mean"] = scaler.mean_
+
+        pipeline_path = Path(pipeline_path or MODELS_DIR / "feature_pipeline.pkl")
+        if pipeline_path.exists():
+            state = joblib.load(pipeline_path)
+            for column, encoder in state["encoders"].items():
+                arrays[f"encoder/{column}"] = np.asarray(encoder.classes_, dtype=str)
+            for column, edges in state["edges"].items():
+                arrays[f"bins/{column}"] = np.asarray(edges, dtype=np.float64)
+        return cls(arrays)
+
+    def save(self, path=EXPORT_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, **self.arrays)  # uncompressed, so it can be memory-mapped
+        return path
+
+    @classmethod
+    def load(cls, path=EXPORT_PATH, mmap=True):
+        if mmap:
+            return cls(_mmap_npz(path))
+        with np.load(path, allow_pickle=False) as z:
+            return cls({k: z[k] for k in z.files})
+
+    # ---------------- inference ----------------
+    def matrix(self, name, X):
+        """X as a float matrix in the model's column order (DataFrames are selected by name)."""
+        if hasattr(X, "columns"):
+            X = X[list(self.arrays[f"{name}/columns"])]
+        return np.asarray(X, dtype=np.float64)
+
+    def centers(self, name):
+        return self.arrays[f"{name}/centers"]
+
+    def predict(self, name, X):
+        """Nearest cluster center of every row, like KMeans.predict (-1 for rows with NaN)."""
+        return nearest_center(self.matrix(name, X), self.centers(name))
+
+    def transform(self, name, X):
+        """Apply a saved StandardScaler / MinMaxScaler."""
+        X = self.matrix(name, X)
+        if f"{name}/min" in self.arrays:
+            return X * self.arrays[f"{name}/scale"] + self.arrays[f"{name}/min"]
+        return (X - self.arrays[f"{name}/mean"]) / self.arrays[f"{name}/scale"]
+
+    def encode(self, column, values):
+        """LabelEncoder codes of ``values``; unknown values raise ValueError."""
+        classes = self.arrays[f"encoder/{column}"]
+        values = np.asarray(values, dtype=str)
+        order = np.argsort(classes, kind="stable")
+        pos = np.minimum(np.searchsorted(classes, values, sorter=order), len(classes) - 1)
+        codes = order[pos]
+        unknown = classes[codes] != values
+        if unknown.any():
+            raise ValueError(f"{column}: unknown labels {np.unique(values[unknown])[:5]}")
+        return codes
+
+
+if __name__ == "__main__":
+    export = ModelExport.build()
+    path = export.save()
+    pickles = [p for p in list(KMEANS_MODELS.values()) + list(SCALERS.values()) if p.exists()]
+    before = sum(p.stat().st_size for p in pickles)
+    print(f"✅ Model export saved → {path} ({len(export.arrays)} arrays)")
+    print(f"   {path.stat().st_size / 1e3:,.1f} KB vs {before / 1e3:,.1f} KB of pickled models")
@@ -0,0 +1,70 @@
+"""
+PatrolIQ - DBSCAN Reachability
+---------------------------------------
+OPTICS reachability ordering of the DBSCAN input, computed once by the batch
+job (geo_clustering.py) so that DBSCAN can be re-cut at any eps afterwards.
+
+OPTICS with ``min_samples`` and ``max_eps`` stores, for every point, its core
+distance and its reachability distance in the OPTICS visit order. For any
+eps <= max_eps, ``cluster_optics_dbscan`` reads the DBSCAN(eps, min_samples)
+clustering off these arrays in one linear pass: no neighbour search, no
+refit. Core points and clusters are those of DBSCAN; a border point reachable
+from two clusters may go to either.
+
+Saved arrays (models/clustering/dbscan_reachability.npz):
+
+  points           the clustered coordinates, in input order
+  columns          their column names
+  ordering         OPTICS visit order
+  reachability     reachability distance of every point (inf if none <= max_eps)
+  core_distances   distance to the min_samples-th neighbour (inf if > max_eps)
+  min_samples, max_eps
+"""
+
+import numpy as np
+from pathlib import Path
+from sklearn.cluster import OPTICS, cluster_optics_dbscan
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+REACHABILITY_PATH = BASE_DIR / "models" / "clustering" / "dbscan_reachability.npz"
+
+MAX_EPS = 0.01  # largest eps offered afterwards (twice the batch DBSCAN eps)
+
+
+class Reachability:
+    def __init__(self, points, columns, ordering, reachability, core_distances, min_samples, max_eps):
+        self.points = points
+        self.columns = columns
+        self.ordering = ordering
+        self.reachability = reachability
+        self.core_distances = core_distances
+        self.min_samples = min_samples
+        self.max_eps = max_eps
+
+    @classmethod
+    def build(cls, coords, min_samples=30, max_eps=MAX_EPS, n_jobs=-1):
+        points = coords.to_numpy(dtype=np.float64)
+        optics = OPTICS(min_samples=min_samples, max_eps=max_eps, n_jobs=n_jobs).fit(points)
+        return cls(points, np.asarray(coords.columns, dtype=str), optics.ordering_,
+                   optics.reachability_, optics.core_distances_, min_samples, max_eps)
+
+    def save(self, path=REACHABILITY_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, points=self.points, columns=self.columns, ordering=self.ordering,
+                            reachability=self.reachability, core_distances=self.core_distances,
+                            min_samples=self.min_samples, max_eps=self.max_eps)
+        return path
+
+    @classmethod
+    def load(cls, path=REACHABILITY_PATH):
+        with np.load(path, allow_pickle=False) as z:
+            return cls(z["points"], z["columns"], z["ordering"], z["reachability"], z["core_distances"],
+                       int(z["min_samples"]), float(z["max_eps"]))
+
+    def labels(self, eps):
+        """DBSCAN(eps, min_samples) labels of the points (-1 = noise), for eps <= max_eps."""
+        if eps > self.max_eps:
+            raise ValueError(f"eps={eps} exceeds the max_eps={self.max_eps} the ordering was built with")
+        return cluster_optics_dbscan(reachability=self.reachability, core_distances=self.core_distances,
+                                     ordering=self.ordering, eps=eps)
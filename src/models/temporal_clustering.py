@@ -4,16 +4,38 @@ PatrolIQ - Temporal Crime Clustering
 Clusters crime data based on temporal features:
 Hour, Weekday, Month, Season, and Weekend/Weekday patterns.
 Generates cluster metrics and summaries for PatrolIQ dashboards.
+
+With --dedupe the rows are collapsed to their distinct feature tuples (a few
+tens of thousands, whatever the row count). The scaler and KMeans are fitted
+with the tuple counts as sample_weight, silhouette and Davies-Bouldin are
+weighted the same way, and labels are mapped back to the rows.
+
+With --coreset N the sweep runs on an N-point weighted coreset of the scaled
+rows (coreset.py); rows are labelled by predict, and the chosen model is
+checked against an exact KMeans run on a uniform sample of the rows.
+
+With --warm-start the sweep is skipped: the persisted kmeans_temporal.pkl
+is refitted from its own centers (mapped through yesterday's and today's
+scaler) with a single init (warm_start.py). The sweep runs only if the
+centers drift beyond --drift-threshold. Iterations, drift and the time
+saved against the last full sweep are recorded under "retrain".
 """
 
 import pandas as pd
 import numpy as np
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score, davies_bouldin_score
+from cluster_scoring import SAMPLE_SIZE, SILHOUETTE_MODES, davies_bouldin, silhouette
+from coreset import StreamingCoreset, approximation_error
+from model_export import compact
+from warm_start import DRIFT_THRESHOLD, retrain_record, warm_fit
 from pathlib import Path
+from joblib import Parallel, delayed
+import argparse
 import json
 import joblib
+import os
+import time
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -24,9 +46,34 @@ BASE_DIR = Path(__file__).resolve().parents[2]
 DATA_PATH = BASE_DIR / "data" / "processed" / "model_ready_data.csv"
 REPORTS_DIR = BASE_DIR / "reports" / "summaries"
 MODELS_DIR = BASE_DIR / "models" / "temporal"
+KMEANS_PATH = MODELS_DIR / "kmeans_temporal.pkl"
+SCALER_PATH = MODELS_DIR / "temporal_scaler.pkl"
+METRICS_PATH = REPORTS_DIR / "temporal_clustering_metrics.json"
 REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 MODELS_DIR.mkdir(parents=True, exist_ok=True)
 
+K_RANGE = range(4, 9)
+CORESET_CHUNK = 100000  # rows streamed into the coreset at a time
+
+parser = argparse.ArgumentParser(description="Temporal KMeans sweep over K_RANGE")
+parser.add_argument("--workers", type=int, default=min(len(K_RANGE), os.cpu_count() or 1),
+                    help="processes for the k sweep (default: one per k, up to the CPU count)")
+parser.add_argument("--silhouette", choices=SILHOUETTE_MODES, default="sampled",
+                    help="sampled: stratified sample with confidence interval; exact: all rows, blocked")
+parser.add_argument("--silhouette-sample", type=int, default=SAMPLE_SIZE,
+                    help="anchor rows for the sampled silhouette")
+summary = parser.add_mutually_exclusive_group()
+summary.add_argument("--dedupe", action="store_true",
+                     help="fit on distinct feature tuples weighted by their row counts")
+summary.add_argument("--coreset", type=int, default=0,
+                     help="fit on a weighted coreset of this many points (0 = off)")
+parser.add_argument("--warm-start", action="store_true",
+                    help="refit the persisted model from its centers (single init) instead of the k sweep")
+parser.add_argument("--drift-threshold", type=float, default=DRIFT_THRESHOLD,
+                    help="with --warm-start: largest center shift (fraction of the RMS cluster radius)"
+                         " before falling back to the k sweep")
+args = parser.parse_args()
+
 # ======================================================
 # LOAD DATA
 # ======================================================
@@ -41,34 +88,122 @@ print(f"✅ Data loaded for temporal clustering: {df_temp.shape}")
 # ======================================================
 # PREPROCESSING
 # ======================================================
+# yesterday's model and scaler, read before today's scaler replaces it
+previous = None
+if args.warm_start and KMEANS_PATH.exists() and SCALER_PATH.exists():
+    previous = joblib.load(KMEANS_PATH), joblib.load(SCALER_PATH)
+
 scaler = StandardScaler()
-X_scaled = scaler.fit_transform(df_temp)
-joblib.dump(scaler, MODELS_DIR / "temporal_scaler.pkl")
+if args.dedupe:
+    tuples, inverse, weights = np.unique(df_temp.to_numpy(), axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    tuples = pd.DataFrame(tuples, columns=temporal_cols)
+    X_scaled = scaler.fit(tuples, sample_weight=weights).transform(tuples)
+    print(f"✅ Collapsed {len(df_temp):,} rows to {len(tuples):,} distinct feature tuples")
+elif args.coreset:
+    inverse = None
+    X_rows = scaler.fit_transform(df_temp)
+    builder = StreamingCoreset(args.coreset)
+    for start in range(0, len(X_rows), CORESET_CHUNK):
+        builder.add(X_rows[start:start + CORESET_CHUNK])
+    X_scaled, weights = builder.coreset()
+    print(f"✅ Coreset of {len(X_rows):,} rows: {len(X_scaled):,} weighted points")
+else:
+    inverse, weights = None, None
+    X_scaled = scaler.fit_transform(df_temp)
+joblib.dump(scaler, SCALER_PATH)
 
 # ======================================================
 # KMEANS CLUSTERING (multiple K)
 # ======================================================
-results = {}
-for k in range(4, 9):
-    print(f"🔹 Running KMeans (k={k})...")
+def score(X, labels, weights, silhouette_mode, sample_size):
+    scores = silhouette(X, labels, mode=silhouette_mode, sample_size=sample_size, weights=weights)
+    scores["davies_bouldin"] = davies_bouldin(X, labels, weights)
+    if weights is not None:
+        scores["points"] = len(X)
+    return scores
+
+def fit_k(k, X, weights, silhouette_mode, sample_size):
+    """Fit and score one k; runs in a worker process."""
+    start = time.perf_counter()
     kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-    labels = kmeans.fit_predict(X_scaled)
+    labels = kmeans.fit_predict(X, sample_weight=weights)
+    scores = score(X, labels, weights, silhouette_mode, sample_size)
+    scores["seconds"] = round(time.perf_counter() - start, 2)
+    return k, kmeans, scores
+
+def run_sweep():
+    # Each k is an independent job. joblib memory-maps X_scaled to the workers
+    # and caps each worker's BLAS/OpenMP threads to its share of the cores.
+    print(f"🔹 Running KMeans for k={K_RANGE.start}..{K_RANGE.stop - 1} on {args.workers} worker(s)...")
+    sweep_start = time.perf_counter()
+    sweep = Parallel(n_jobs=args.workers)(
+        delayed(fit_k)(k, X_scaled, weights, args.silhouette, args.silhouette_sample) for k in K_RANGE)
+    sweep_seconds = time.perf_counter() - sweep_start
+
+    results, models = {}, {}
+    for k, kmeans, scores in sweep:
+        results[k], models[k] = scores, kmeans
+        print(f"✅ K={k} | Silhouette={scores['silhouette']:.4f} ({scores['silhouette_mode']})"
+              f" | DB Index={scores['davies_bouldin']:.4f} | {scores['seconds']:.1f}s")
+
+    serial_seconds = sum(r["seconds"] for r in results.values())
+    print(f"⏱️ Sweep wall time: {sweep_seconds:.1f}s (sum of per-k times: {serial_seconds:.1f}s,"
+          f" {serial_seconds / sweep_seconds:.1f}x)")
+    return results, models, sweep_seconds
+
+def last_full_search_seconds():
+    """Wall time of the last k sweep, from the previous metrics (None if unknown)."""
+    if not METRICS_PATH.exists():
+        return None
+    with open(METRICS_PATH) as f:
+        for scores in json.load(f).values():
+            if "retrain" in scores:
+                return scores["retrain"].get("full_search_seconds")
+    return None
 
-    sil = float(silhouette_score(X_scaled, labels))
-    db = float(davies_bouldin_score(X_scaled, labels))
-    results[k] = {"silhouette": sil, "davies_bouldin": db}
-    print(f"✅ K={k} | Silhouette={sil:.4f} | DB Index={db:.4f}")
+warm = None
+if args.warm_start:
+    if previous is None:
+        print(f"⚠️ No persisted model in {MODELS_DIR}: running the full sweep")
+    else:
+        previous_kmeans, previous_scaler = previous
+        # yesterday's centers, in today's scaling
+        centers = scaler.transform(pd.DataFrame(previous_scaler.inverse_transform(previous_kmeans.cluster_centers_),
+                                                columns=temporal_cols))
+        kmeans, warm = warm_fit(X_scaled, centers, weights)
+        print(f"✅ Warm start from {KMEANS_PATH.name} (K={len(centers)}): {warm['iterations']} iteration(s),"
+              f" {warm['seconds']:.2f}s, drift {warm['drift']:.3f}")
+        if warm["drift"] > args.drift_threshold:
+            print(f"⚠️ Drift above {args.drift_threshold}: falling back to the full sweep")
 
-# Choose best K based on silhouette
-best_k = max(results, key=lambda x: results[x]["silhouette"])
-print(f"\n🏆 Best number of clusters: K={best_k}")
+full_seconds = None
+if warm is None or warm["drift"] > args.drift_threshold:
+    results, models, sweep_seconds = run_sweep()
+    full_seconds = round(sweep_seconds, 2)
+    # Choose best K based on silhouette
+    best_k = max(results, key=lambda x: results[x]["silhouette"])
+    print(f"\n🏆 Best number of clusters: K={best_k}")
+else:
+    best_k = len(centers)
+    results = {best_k: score(X_scaled, kmeans.labels_, weights, args.silhouette, args.silhouette_sample)}
+    results[best_k]["seconds"] = warm["seconds"]
+    models = {best_k: kmeans}
+results[best_k]["retrain"] = retrain_record(warm, args.drift_threshold, full_seconds, last_full_search_seconds())
 
 # ======================================================
-# FINAL MODEL TRAINING
+# FINAL MODEL (reused from the sweep / warm start, not refitted)
 # ======================================================
-kmeans_final = KMeans(n_clusters=best_k, random_state=42, n_init=10)
-df["TemporalCluster"] = kmeans_final.fit_predict(X_scaled)
-joblib.dump(kmeans_final, MODELS_DIR / "kmeans_temporal.pkl")
+kmeans_final = models[best_k]
+if args.coreset:
+    df["TemporalCluster"] = kmeans_final.predict(X_rows)
+    results[best_k]["coreset"] = approximation_error(builder.benchmark, kmeans_final.cluster_centers_)
+    print(f"✅ Coreset KMeans vs exact run on {len(builder.benchmark):,} sampled rows:"
+          f" {results[best_k]['coreset']['relative_error']:+.2%} cost")
+else:
+    labels = kmeans_final.labels_
+    df["TemporalCluster"] = labels if inverse is None else labels[inverse]
+joblib.dump(compact(kmeans_final), KMEANS_PATH)
 
 # ======================================================
 # CLUSTER SUMMARY
@@ -85,7 +220,7 @@ print("\n📊 Temporal Cluster Summary:\n", cluster_summary.head())
 # ======================================================
 # SAVE RESULTS
 # ======================================================
-metrics_path = REPORTS_DIR / "temporal_clustering_metrics.json"
+metrics_path = METRICS_PATH
 summary_path = REPORTS_DIR / "temporal_cluster_summary.csv"
 
 with open(metrics_path, "w") as f:
@@ -0,0 +1,52 @@
+"""
+PatrolIQ - Warm-Started Retraining
+---------------------------------------
+Nightly refit of a persisted KMeans from its own centers instead of a fresh
+search (k-means++ with n_init=10, for every k of a sweep).
+
+Centers barely move from one day's data to the next, so Lloyd iterations
+started from yesterday's centers (n_init=1) converge in a few steps. The
+drift of the refit is the largest center shift measured in units of the
+RMS distance of a row to its center (the typical cluster radius), so one
+threshold fits any feature scale. Above DRIFT_THRESHOLD the clusters are
+assumed to have changed shape, and the caller falls back to the full search.
+"""
+
+import time
+import numpy as np
+from sklearn.cluster import KMeans
+
+DRIFT_THRESHOLD = 0.25  # largest center shift, as a fraction of the RMS cluster radius
+
+
+def warm_fit(X, centers, sample_weight=None):
+    """KMeans started from ``centers`` (single init); returns the model and its retrain record."""
+    start = time.perf_counter()
+    centers = np.asarray(centers, dtype=np.float64)
+    kmeans = KMeans(n_clusters=len(centers), init=centers, n_init=1).fit(X, sample_weight=sample_weight)
+    seconds = time.perf_counter() - start
+
+    rows = len(X) if sample_weight is None else float(np.sum(sample_weight))
+    radius = np.sqrt(kmeans.inertia_ / rows)
+    shift = np.linalg.norm(kmeans.cluster_centers_ - centers, axis=1).max()
+    return kmeans, {
+        "iterations": int(kmeans.n_iter_),
+        "seconds": round(seconds, 2),
+        "drift": float(shift / radius) if radius > 0 else 0.0,
+    }
+
+
+def retrain_record(warm, threshold, full_seconds=None, previous_full_seconds=None):
+    """Retrain entry of the metrics JSON.
+
+    ``warm`` is the warm_fit record (None when no model was persisted) and
+    ``full_seconds`` the time of the full search if one ran. The last full
+    search time is carried along so later warm runs can report the time saved.
+    """
+    record = {"mode": "full" if full_seconds is not None else "warm", "drift_threshold": threshold}
+    if warm is not None:
+        record.update({f"warm_{key}": value for key, value in warm.items()})
+    record["full_search_seconds"] = full_seconds if full_seconds is not None else previous_full_seconds
+    if full_seconds is None and previous_full_seconds is not None:
+        record["seconds_saved"] = round(previous_full_seconds - warm["seconds"], 2)
+    return record
@@ -0,0 +1,113 @@
+"""
+PatrolIQ - Weighted Ward Clustering
+---------------------------------------
+Ward hierarchical clustering of weighted points, and a two-stage mode that
+scales it to every row:
+
+  1. micro-clusters - a fine MiniBatchKMeans (MICRO_CLUSTERS centers) over
+     all rows; each center is weighted by its number of rows;
+  2. Ward          - exact weighted Ward linkage of the centers.
+
+Merging two clusters A and B raises the total within-cluster sum of squares
+by  w_A * w_B / (w_A + w_B) * ||c_A - c_B||²  whatever their inner spread, so
+Ward on weighted centers is Ward on the rows collapsed to their centers.
+The linkage is a standard SciPy linkage matrix (dendrogram, fcluster); its
+count column counts weighted points (micro-clusters), not rows. Only the
+centers are clustered, so memory is O(micro-clusters) instead of the O(n²)
+of AgglomerativeClustering.
+
+With ``sample_weight`` (rows collapsed to distinct points and their counts)
+both stages are weighted, and inputs of at most MICRO_CLUSTERS points are
+used as the micro-clusters directly, so their Ward linkage is exact.
+"""
+
+import numpy as np
+from scipy.cluster.hierarchy import fcluster
+from sklearn.cluster import MiniBatchKMeans
+
+MICRO_CLUSTERS = 2000
+
+
+def ward_linkage(X, weights=None):
+    """SciPy-style Ward linkage matrix of weighted points (nearest-neighbour chain).
+
+    With unit weights the merge heights equal ``scipy.cluster.hierarchy.linkage(X, "ward")``.
+    """
+    centers = np.array(X, dtype=np.float64)
+    size = np.ones(len(centers)) if weights is None else np.array(weights, dtype=np.float64)
+    m = len(centers)
+    leaves = np.ones(m)
+    active = np.ones(m, dtype=bool)
+    merges = []
+    chain = []
+    while len(merges) < m - 1:
+        if not chain:
+            chain.append(int(np.flatnonzero(active)[0]))
+        a = chain[-1]
+        cost = size[a] * size / (size[a] + size) * ((centers - centers[a]) ** 2).sum(axis=1)
+        cost[~active] = np.inf
+        cost[a] = np.inf
+        b = int(np.argmin(cost))
+        if len(chain) > 1 and cost[chain[-2]] <= cost[b]:
+            b = chain[-2]
+        if len(chain) > 1 and b == chain[-2]:
+            chain = chain[:-2]
+            total = size[a] + size[b]
+            merges.append((a, b, np.sqrt(2 * cost[b]), leaves[a] + leaves[b]))
+            leaves[a] += leaves[b]
+            centers[a] = (size[a] * centers[a] + size[b] * centers[b]) / total
+            size[a] = total
+            active[b] = False
+        else:
+            chain.append(b)
+
+    # Ward is reducible, so sorting the chain's merges by height yields the
+    # hierarchy; a union-find over slots assigns SciPy cluster ids.
+    parent = np.arange(m)
+    cluster_id = np.arange(m)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    Z = np.empty((m - 1, 4))
+    for row, (a, b, height, count) in enumerate(sorted(merges, key=lambda merge: merge[2])):
+        ra, rb = find(a), find(b)
+        Z[row] = [min(cluster_id[ra], cluster_id[rb]), max(cluster_id[ra], cluster_id[rb]), height, count]
+        parent[rb] = ra
+        cluster_id[ra] = m + row
+    return Z
+
+
+class TwoStageWard:
+    """Micro-clusters over all rows, then weighted Ward on their centers."""
+
+    def __init__(self, n_clusters=9, n_micro=MICRO_CLUSTERS, random_state=42):
+        self.n_clusters = n_clusters
+        self.n_micro = n_micro
+        self.random_state = random_state
+
+    def fit(self, X, y=None, sample_weight=None):
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) <= self.n_micro:  # few enough points to be the micro-clusters themselves
+            codes, centers = np.arange(len(X)), X
+        else:
+            micro = MiniBatchKMeans(n_clusters=self.n_micro, batch_size=10000,
+                                    random_state=self.random_state).fit(X, sample_weight=sample_weight)
+            codes, centers = micro.labels_, micro.cluster_centers_
+        weights = np.bincount(codes, weights=sample_weight, minlength=len(centers))
+        used = np.flatnonzero(weights)  # drop centers that ended up without rows
+        self.micro_centers_ = centers[used]
+        self.micro_weights_ = weights[used]
+        self.linkage_ = ward_linkage(self.micro_centers_, self.micro_weights_)
+
+        micro_cluster = np.full(len(centers), -1)
+        micro_cluster[used] = fcluster(self.linkage_, self.n_clusters, criterion="maxclust") - 1
+        self.micro_labels_ = micro_cluster[used]
+        self.labels_ = micro_cluster[codes]
+        return self
+
+    def fit_predict(self, X, y=None, sample_weight=None):
+        return self.fit(X, sample_weight=sample_weight).labels_
@@ -0,0 +1,89 @@
+"""
+benchmark_data_store.py
+---------------------------------
+Compares load time and in-memory size of the legacy CSV pair against the
+typed Parquet store (full read and per-consumer column projections).
+If the CSV pair is not on disk it is regenerated from the store in a
+temporary directory, so only the Parquet store is required.
+"""
+
+import json
+import sys
+import tempfile
+import time
+import pandas as pd
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "src" / "data_preprocessing"))
+
+from clean_data import OUTPUT_PATH as STORE_PATH  # noqa: E402
+
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+CSV_PARTS = [PROCESSED_DIR / "sample_250000_rows_01.csv",
+             PROCESSED_DIR / "sample_250000_rows_02.csv"]
+OUT_PATH = BASE_DIR / "reports" / "summaries" / "data_store_benchmark.json"
+REPEATS = 3
+
+PROJECTIONS = {
+    "temporal_page": ["Date", "Year", "Month", "Day", "Hour", "Weekday"],
+    "geographic_page": ["Date", "Latitude", "Longitude", "Primary Type",
+                        "Location Description", "Community Area", "Arrest"],
+    "feature_engineering": ["Year", "Month", "Day", "Hour", "Weekday", "Primary Type",
+                            "Location Description", "District", "Ward", "Community Area",
+                            "Latitude", "Longitude", "Arrest"],
+}
+
+
+def load_csv_pair(paths):
+    df = pd.concat([pd.read_csv(p, low_memory=False) for p in paths], ignore_index=True)
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    return df
+
+
+def measure(name, loader):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        df = loader()
+        timings.append(time.perf_counter() - start)
+    result = {
+        "seconds": round(min(timings), 4),
+        "memory_mb": round(df.memory_usage(deep=True).sum() / 1e6, 2),
+        "columns": df.shape[1],
+        "rows": len(df),
+    }
+    print(f"{name:<28} {result['seconds']:>8.3f}s {result['memory_mb']:>10.1f} MB  {df.shape[1]:>3} cols")
+    return result
+
+
+if __name__ == "__main__":
+    if not STORE_PATH.exists():
+        raise FileNotFoundError(f"❌ Parquet store not found: {STORE_PATH} (run clean_data.py)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_paths = CSV_PARTS
+        if not all(p.exists() for p in CSV_PARTS):
+            store = pd.read_parquet(STORE_PATH)
+            mid = len(store) // 2
+            csv_paths = [Path(tmp) / p.name for p in CSV_PARTS]
+            store.iloc[:mid].to_csv(csv_paths[0], index=False)
+            store.iloc[mid:].to_csv(csv_paths[1], index=False)
+            del store
+
+        print(f"{'loader':<28} {'time':>9} {'memory':>13}")
+        results = {"csv_pair": measure("csv_pair", lambda: load_csv_pair(csv_paths))}
+        results["parquet_full"] = measure("parquet_full", lambda: pd.read_parquet(STORE_PATH))
+        for name, cols in PROJECTIONS.items():
+            results[f"parquet_{name}"] = measure(
+                f"parquet_{name}", lambda cols=cols: pd.read_parquet(STORE_PATH, columns=cols))
+
+    base = results["csv_pair"]
+    for name, r in results.items():
+        r["speedup_vs_csv"] = round(base["seconds"] / r["seconds"], 2)
+        r["memory_ratio_vs_csv"] = round(r["memory_mb"] / base["memory_mb"], 3)
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(OUT_PATH, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"\n✅ Benchmark saved → {OUT_PATH}")
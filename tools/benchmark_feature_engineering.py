@@ -0,0 +1,113 @@
+"""
+benchmark_feature_engineering.py
+---------------------------------
+Times the row-wise Season / IsWeekend / TimeOfDay / Severity transforms
+(``Series.apply`` of the scalar helpers, ``isin``, ``pd.cut``) against the
+vectorized lookups used by engineer_features, at 500k and 5M rows. The
+row-wise baseline keeps verbatim copies of the pre-vectorization helpers,
+so later edits to feature_engineering.py do not change it.
+Frames are resampled (with replacement) from the Parquet store, and both
+paths are checked to produce identical columns.
+"""
+
+import json
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "src" / "analysis"))
+
+from feature_engineering import (DATA_PATH, TIME_OF_DAY_BINS, TIME_OF_DAY_LABELS,  # noqa: E402
+                                 season_labels, severity_scores, time_of_day)
+
+OUT_PATH = BASE_DIR / "reports" / "summaries" / "feature_engineering_benchmark.json"
+SIZES = [500_000, 5_000_000]
+COLUMNS = ["Month", "Weekday", "Hour", "Primary Type"]
+REPEATS = 3
+
+
+# ======================================================
+# BASELINE: scalar helpers as they were before vectorization (verbatim)
+# ======================================================
+def assign_season(month):
+    if month in [12, 1, 2]: return "Winter"
+    elif month in [3, 4, 5]: return "Spring"
+    elif month in [6, 7, 8]: return "Summer"
+    return "Fall"
+
+
+def create_crime_severity(type_):
+    severity_map = {
+        "HOMICIDE": 5, "CRIM SEXUAL ASSAULT": 5, "CRIMINAL SEXUAL ASSAULT": 5,
+        "KIDNAPPING": 5, "HUMAN TRAFFICKING": 5,
+        "ASSAULT": 4, "BATTERY": 4, "ROBBERY": 4, "ARSON": 4,
+        "WEAPONS VIOLATION": 4, "INTIMIDATION": 4, "STALKING": 4,
+        "OFFENSE INVOLVING CHILDREN": 4,
+        "BURGLARY": 3, "MOTOR VEHICLE THEFT": 3, "CRIMINAL DAMAGE": 3,
+        "CRIMINAL TRESPASS": 3, "INTERFERENCE WITH PUBLIC OFFICER": 3,
+        "CONCEALED CARRY LICENSE VIOLATION": 3,
+        "THEFT": 2, "DECEPTIVE PRACTICE": 2, "NARCOTICS": 2,
+        "OTHER OFFENSE": 2, "OTHER NARCOTIC VIOLATION": 2,
+        "PUBLIC PEACE VIOLATION": 2, "SEX OFFENSE": 2,
+        "LIQUOR LAW VIOLATION": 2,
+        "GAMBLING": 1, "PROSTITUTION": 1, "PUBLIC INDECENCY": 1,
+        "OBSCENITY": 1,
+        "NON-CRIMINAL": 0
+    }
+    return severity_map.get(type_, 1)
+
+
+def rowwise(df):
+    return pd.DataFrame({
+        "Season": df["Month"].apply(assign_season),
+        "IsWeekend": df["Weekday"].isin([5, 6]).astype(int),
+        "TimeOfDay": pd.cut(df["Hour"], bins=TIME_OF_DAY_BINS, labels=TIME_OF_DAY_LABELS, right=False),
+        "Severity": df["Primary Type"].apply(create_crime_severity),
+    })
+
+
+def vectorized(df):
+    return pd.DataFrame({
+        "Season": season_labels(df["Month"]),
+        "IsWeekend": (df["Weekday"] >= 5).astype(int),
+        "TimeOfDay": time_of_day(df["Hour"]),
+        "Severity": severity_scores(df["Primary Type"]),
+    })
+
+
+def measure(func, df):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        out = func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings), out
+
+
+if __name__ == "__main__":
+    # the original script read a CSV: plain object / int64 columns. On the store's
+    # categorical Primary Type, .apply would run once per category, not per row.
+    store = pd.read_parquet(DATA_PATH, columns=COLUMNS).astype(
+        {"Primary Type": object, "Month": "int64", "Weekday": "int64", "Hour": "int64"})
+    rng = np.random.default_rng(42)
+
+    results = {}
+    print(f"{'rows':>10} {'row-wise':>10} {'vectorized':>11} {'speedup':>8}")
+    for n in SIZES:
+        df = store.iloc[rng.integers(0, len(store), n)].reset_index(drop=True)
+        slow, expected = measure(rowwise, df)
+        fast, got = measure(vectorized, df)
+        for col in expected.columns:
+            if not np.array_equal(expected[col].astype(str).to_numpy(), got[col].astype(str).to_numpy()):
+                raise AssertionError(f"{col} differs between the row-wise and vectorized paths")
+        results[n] = {"rowwise_seconds": round(slow, 4), "vectorized_seconds": round(fast, 4),
+                      "speedup": round(slow / fast, 1)}
+        print(f"{n:>10,} {slow:>9.3f}s {fast:>10.3f}s {slow / fast:>7.1f}x")
+
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(OUT_PATH, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"\n✅ Benchmark saved → {OUT_PATH}")
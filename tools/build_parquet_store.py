@@ -0,0 +1,36 @@
+"""
+build_parquet_store.py
+---------------------------------
+Converts an existing processed CSV sample (the 500k file or the legacy
+sample_250000_rows_01/02 pair) into the typed Parquet store, for setups
+that already have the CSVs and don't want to rerun clean_data.py.
+"""
+
+import sys
+import pandas as pd
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "src" / "data_preprocessing"))
+
+from clean_data import OUTPUT_PATH, write_store  # noqa: E402
+
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+CSV_FULL = PROCESSED_DIR / "sample_500000_rows.csv"
+CSV_PARTS = [PROCESSED_DIR / "sample_250000_rows_01.csv",
+             PROCESSED_DIR / "sample_250000_rows_02.csv"]
+
+if CSV_FULL.exists():
+    sources = [CSV_FULL]
+elif all(p.exists() for p in CSV_PARTS):
+    sources = CSV_PARTS
+else:
+    raise FileNotFoundError(f"❌ No processed CSV found in: {PROCESSED_DIR}")
+
+for path in sources:
+    print(f"Loading: {path}")
+df = pd.concat([pd.read_csv(p, low_memory=False) for p in sources], ignore_index=True)
+print(f"Total rows: {len(df):,}")
+
+write_store(df, OUTPUT_PATH)
+print(f"✅ Wrote: {OUTPUT_PATH} ({OUTPUT_PATH.stat().st_size / 1e6:.1f} MB)")